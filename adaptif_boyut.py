@@ -0,0 +1,85 @@
+"""
+Uzaklığa göre uyarlanan YOLO giriş boyutu (imgsz).
+
+Yakın dubalar yüzlerce piksel boyundadır; onları bulmak için tam çözünürlük
+gerekmez. Takip edilen en küçük dubanın yüksekliğine (uzaklık hesabındaki
+obj_h) bakılarak, o dubanın modele en az min_target_px boyunda gireceği en
+küçük imgsz kovası seçilir. Uzak (küçük) dubalar varsa yüksek çözünürlük korunur.
+
+Takip edilen duba yoksa ya da periyodik yoklama karesiyse en az default_imgsz
+kullanılır, böylece uzaktaki yeni dubalar kaçırılmaz. Büyütme hemen, küçültme
+ise hold_frames kare boyunca istikrarlı olunca yapılır (kovalar arasında gidip
+gelmesin diye). Her kova için kare gecikmesi ayrı ölçülüp periyodik yazdırılır.
+"""
+import time
+
+from olcum import LatencyStats
+
+
+class AdaptiveImgsz:
+    def __init__(self, sizes=(320, 416, 512, 640, 800, 960, 1280), default_imgsz=640,
+                 min_target_px=28, hold_frames=10, probe_interval=15, report_interval=10.0):
+        self.sizes = tuple(sorted(sizes))
+        self.default_imgsz = default_imgsz
+        self.min_target_px = min_target_px      # En küçük duba modele bu boydan küçük girmesin
+        self.hold_frames = hold_frames
+        self.probe_interval = probe_interval    # Her N karede bir en az default_imgsz
+        self.report_interval = report_interval
+
+        self.current = default_imgsz
+        self.lower_count = 0
+        self.frame_count = 0
+
+        self.stats = {size: LatencyStats() for size in self.sizes}
+        self.last_report = time.time()
+
+    def required_size(self, min_obj_h, frame_shape):
+        """En küçük dubanın min_target_px olması için gereken imgsz kovası"""
+        long_side = max(frame_shape[0], frame_shape[1])
+        required = long_side * self.min_target_px / max(1.0, float(min_obj_h))
+        for size in self.sizes:
+            if size >= required:
+                return size
+        return self.sizes[-1]
+
+    def choose(self, min_obj_h, frame_shape):
+        """Bu kare için imgsz; min_obj_h: takip edilen en küçük duba yüksekliği (None = yok)"""
+        self.frame_count += 1
+
+        if min_obj_h is None:
+            target = self.default_imgsz
+        else:
+            target = self.required_size(min_obj_h, frame_shape)
+
+        # Periyodik yoklama: uzakta yeni duba belirdiyse bulunabilsin
+        if self.probe_interval and self.frame_count % self.probe_interval == 0:
+            return max(target, self.default_imgsz)
+
+        if target >= self.current:
+            self.current = target
+            self.lower_count = 0
+        else:
+            self.lower_count += 1
+            if self.lower_count >= self.hold_frames:
+                self.current = target
+                self.lower_count = 0
+
+        return self.current
+
+    def record(self, imgsz, seconds):
+        """Kova gecikmesini kaydet, report_interval'da bir yazdır"""
+        stats = self.stats.get(imgsz)
+        if stats is None:
+            stats = self.stats[imgsz] = LatencyStats()
+        stats.add(seconds)
+
+        now = time.time()
+        if self.report_interval and now - self.last_report >= self.report_interval:
+            self.last_report = now
+            self.report()
+
+    def report(self):
+        print("--- imgsz kovalarına göre çıkarım süresi ---")
+        for size in sorted(self.stats):
+            if self.stats[size].count:
+                print(self.stats[size].format(f"imgsz {size}"))
@@ -0,0 +1,484 @@
+"""
+PanTiltController için asyncio tabanlı çalışma zamanı.
+
+PanTiltController.run tek bir while döngüsünde yakalama, tespit, klavye, HTTP ve
+zamanlayıcıları sırayla yapar. Burada her biri ayrı bir görev olarak çalışır ve
+görevler sınırlı kuyruklarla haberleşir:
+
+    yakalama -> tespit -> (hedef) -> kontrol tiki -> servo G/Ç
+                  \\-> ekran / klavye
+    sensör okuma, kayıp hedef bekçisi, istatistik raporu
+    sürüş kararı -> motor köprüsü (motor_port verildiyse)
+
+Kontrol tiki sabit frekansta çalışır; tespit ne kadar yavaş olursa olsun servo
+kontrolü ve ekran akmaya devam eder. Her görevin döngü süresi ölçülür ve
+periyodik olarak yazdırılır.
+"""
+import asyncio
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from olcum import LatencyStats
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp yoksa requests bir iş parçacığında çalıştırılır
+    aiohttp = None
+
+try:
+    import serial
+except ImportError:  # Sensör ve motor görevleri için pyserial gerekli
+    serial = None
+
+
+WINDOW_NAME = 'Pan-Tilt Kamera Kontrolu'
+MODES = ["Tıklama Modu", "Yüz Takip Modu", "Duba Takip Modu"]
+
+_SENSOR_RE = re.compile(r"Sensor\s+(\d+):\s*(-?\d+)\s*cm")
+_DIRECTION_RE = re.compile(r"ideal yon:\s*(\w+)")
+
+
+def put_latest(q, item):
+    """Kuyruk doluysa en eskiyi at, yenisini koy (bloklamaz)"""
+    if q.full():
+        try:
+            q.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    q.put_nowait(item)
+
+
+class AsyncControlRuntime:
+    def __init__(self, controller, control_hz=30.0, sensor_port=None, sensor_baud=9600,
+                 report_interval=5.0, motor_port=None, drive_hz=20.0, sensor_timeout=0.5):
+        self.controller = controller
+        self.control_period = 1.0 / control_hz
+        self.sensor_port = sensor_port
+        self.sensor_baud = sensor_baud
+        self.motor_port = motor_port
+        self.drive_period = 1.0 / drive_hz
+        self.sensor_timeout = sensor_timeout  # Daha eski sensör verisiyle sürülmez
+        self.motor_bridge = None
+        self.report_interval = report_interval
+
+        # Sınırlı kuyruklar: her biri sadece en güncel öğeyi tutar
+        self.detect_q = asyncio.Queue(maxsize=1)
+        self.display_q = asyncio.Queue(maxsize=1)
+        self.servo_q = asyncio.Queue(maxsize=1)
+
+        # Yakalama ve tespit kendi iş parçacıklarında bloklar, olay döngüsü serbest kalır
+        self.capture_executor = ThreadPoolExecutor(max_workers=1)
+        self.detect_executor = ThreadPoolExecutor(max_workers=1)
+        self.io_executor = ThreadPoolExecutor(max_workers=2)
+
+        # Tespit görevinin ürettiği son hedef: (cx, cy, w, h, zaman, zoom)
+        self.target = None
+        self.target_boxes = []
+        self.last_target_time = time.time()
+
+        # mesafe2.ino'dan okunan son değerler
+        self.sensor_cm = {}
+        self.sensor_direction = None
+        self.sensor_time = 0.0
+
+        self.stats = {name: LatencyStats() for name in
+                      ("yakalama", "tespit", "kontrol", "servo", "sensor", "surus", "bekci",
+                       "ekran")}
+        self.session = None
+        self.running = False
+
+    # ---------------------------------------------------------------- görevler
+    async def capture_task(self):
+        loop = asyncio.get_running_loop()
+        c = self.controller
+        while self.running:
+            start = time.perf_counter()
+            ret, frame = await loop.run_in_executor(self.capture_executor, c.camera.read)
+            if not ret:
+                print("Kamera görüntüsü alınamıyor!")
+                self.running = False
+                break
+
+            # Kontrol tiki zoom'u değiştirebilir; karenin çekildiği zoom onunla taşınır
+            frame_zoom = c.zoom_level
+            frame = c.apply_zoom(frame)
+            put_latest(self.detect_q, (frame, frame_zoom))
+            # Ekran kutu ve yazıları kendi kopyasına çizer; tespit temiz kareyi okur
+            put_latest(self.display_q, frame.copy())
+            self.stats["yakalama"].add(time.perf_counter() - start)
+
+    async def detection_task(self):
+        loop = asyncio.get_running_loop()
+        while self.running:
+            frame, frame_zoom = await self.detect_q.get()
+            start = time.perf_counter()
+            mode = self.controller.mode
+            if mode == 0:
+                self.target_boxes = []
+                continue
+
+            boxes, best = await loop.run_in_executor(self.detect_executor, self.detect, frame, mode)
+            self.target_boxes = boxes
+
+            chosen = self.choose_target(boxes, mode, best)
+            if chosen is not None:
+                x, y, w, h = chosen
+                now = time.time()
+                self.target = (x + w // 2, y + h // 2, w, h, now, frame_zoom)
+                self.last_target_time = now
+
+                c = self.controller
+                if c.current_pan is not None:
+                    c.recovery.observe(x + w // 2, y + h // 2, c.current_pan, c.current_tilt,
+                                       frame_zoom, c.frame_width, c.frame_height, now)
+
+            self.stats["tespit"].add(time.perf_counter() - start)
+
+    def choose_target(self, boxes, mode, best=None):
+        """Kontrol tikinin izleyeceği kutu: yüzlerde kilitli iz, dubalarda en güvenlisi
+
+        Dubalarda senkron detect_and_track_cone ile aynı seçim (cones.best) kullanılır.
+        """
+        c = self.controller
+        if mode == 1:
+            c.face_tracker.update(boxes)
+            track = c.face_tracker.select(c.frame_width, c.frame_height)
+            return track.box if track is not None else None
+        if best is None:
+            return None
+        return boxes[best]
+
+    def detect(self, frame, mode):
+        """Bloklayan tespit çağrısı; ((x, y, w, h) listesi, dubalarda en güvenli kutunun indeksi)"""
+        c = self.controller
+        c.buffers.begin_frame()
+        if mode == 1:
+            return c.detect_faces(frame), None
+
+        cones = c.detect_cones(frame)
+        # Sürüş görevi engelleri haritadan okur
+        c.update_cone_map(cones)
+        x1, y1, x2, y2 = cones.boxes.T
+        boxes = list(zip(x1.tolist(), y1.tolist(), (x2 - x1).tolist(), (y2 - y1).tolist()))
+        return boxes, cones.best
+
+    async def control_task(self):
+        """Sabit frekanslı kontrol tiki: son hedefe göre servo komutu üret"""
+        c = self.controller
+        next_tick = time.perf_counter()
+        while self.running:
+            start = time.perf_counter()
+            target = self.target
+            now = time.time()
+
+            # Bayat hedefle servo sürme (tespit takıldıysa)
+            if c.mode != 0 and target is not None and now - target[4] < 0.5:
+                cx, cy, w, h, _, frame_zoom = target
+                # Zoom her tikte süzülmüş hedef boyutuna doğru küçük adımlarla ilerler
+                if c.mode == 1:
+                    c.auto_adjust_zoom(w, center=(cx, cy), measured_zoom=frame_zoom)
+                else:
+                    c.auto_adjust_zoom(h, c.target_cone_height, center=(cx, cy),
+                                       measured_zoom=frame_zoom)
+
+                distance_x = abs(cx - c.frame_width // 2)
+                distance_y = abs(cy - c.frame_height // 2)
+                should_move = (
+                    (distance_x > c.face_dead_zone or distance_y > c.face_dead_zone) and
+                    (now - c.last_face_move_time) > c.face_move_interval and
+                    c.current_pan is not None
+                )
+                if should_move:
+                    pan, tilt = c.calculate_servo_position(
+                        cx, cy, is_face_tracking=True, current=(c.current_pan, c.current_tilt),
+                        zoom=frame_zoom)
+                    put_latest(self.servo_q, (pan, tilt))
+                    c.last_face_move_time = now
+                    # Aynı hedefe tekrar komut vermemek için tüketildi say
+                    self.target = None
+
+            self.stats["kontrol"].add(time.perf_counter() - start)
+
+            # Kayma birikmesin diye bir sonraki tik mutlak zamana göre
+            next_tick += self.control_period
+            delay = next_tick - time.perf_counter()
+            if delay < 0:
+                next_tick = time.perf_counter()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    async def servo_task(self):
+        c = self.controller
+        last_query = float("-inf")
+        while self.running:
+            # Pozisyon bilinmiyorsa (ESP32 açılışta ulaşılamadıysa) periyodik olarak tekrar sor
+            if c.current_pan is None and time.time() - last_query >= c.status_retry_interval:
+                last_query = time.time()
+                c.update_servo_state(await self.http_request(None, None))
+
+            try:
+                pan, tilt = await asyncio.wait_for(self.servo_q.get(), timeout=c.status_retry_interval)
+            except asyncio.TimeoutError:
+                continue
+            start = time.perf_counter()
+            # aiohttp yolu send_servo_command'ı atlar; hareket kapısı yine yeni tespit istesin
+            c.motion_gate.notify_camera_move()
+            status = await self.http_request(pan, tilt)
+            c.update_servo_state(status)
+            self.stats["servo"].add(time.perf_counter() - start)
+
+    async def http_request(self, pan, tilt):
+        """ESP32'ye asenkron istek; pan/tilt None ise durum sorgusu"""
+        c = self.controller
+        if self.session is None:
+            # aiohttp yok: mevcut requests kodunu iş parçacığında çalıştır
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.io_executor, c.send_servo_command, pan, tilt)
+
+        try:
+            if pan is not None and tilt is not None:
+                url = f"http://{c.esp32_ip}/control"
+                response = await self.session.post(url, data={"pan": pan, "tilt": tilt})
+            else:
+                url = f"http://{c.esp32_ip}/status"
+                response = await self.session.get(url)
+
+            async with response:
+                if response.status == 200:
+                    return await response.json(content_type=None)
+                print(f"ESP32 yanıt hatası: {response.status}")
+                return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"ESP32 bağlantı hatası: {e}")
+            return None
+
+    async def sensor_task(self):
+        """mesafe2.ino'nun seri çıktısını oku ("Sensor 1: 23 cm", "ideal yon: sol")"""
+        if self.sensor_port is None:
+            return
+        if serial is None:
+            print("pyserial yüklü değil, sensör görevi çalışmıyor")
+            return
+
+        loop = asyncio.get_running_loop()
+        try:
+            port = serial.Serial(self.sensor_port, self.sensor_baud, timeout=0.5)
+        except serial.SerialException as e:
+            print(f"Sensör portu açılamadı: {e}")
+            return
+
+        try:
+            while self.running:
+                raw = await loop.run_in_executor(self.io_executor, port.readline)
+                start = time.perf_counter()
+                if not raw:
+                    continue
+                line = raw.decode(errors="ignore")
+
+                m = _SENSOR_RE.search(line)
+                if m:
+                    self.sensor_cm[int(m.group(1))] = int(m.group(2))
+                    self.sensor_time = time.time()
+                m = _DIRECTION_RE.search(line)
+                if m:
+                    self.sensor_direction = m.group(1)
+                self.stats["sensor"].add(time.perf_counter() - start)
+        finally:
+            port.close()
+
+    async def drive_task(self):
+        """Sensör yönü ve duba haritasından sürüş kararı; motor köprüsüne bırak
+
+        Sensör verisi tazeyse her tikte set_command çağrılır. Sensör ya da bu
+        görev takılırsa köprü command_timeout sonunda kendiliğinden dur gönderir.
+        """
+        if self.motor_port is None:
+            return
+        if serial is None:
+            print("pyserial yüklü değil, motor görevi çalışmıyor")
+            return
+
+        from motor_kopru import MotorBridge, drive_decision
+
+        bridge = MotorBridge(self.motor_port)
+        try:
+            bridge.open()
+        except serial.SerialException as e:
+            print(f"Motor portu açılamadı: {e}")
+            return
+        self.motor_bridge = bridge
+
+        c = self.controller
+        try:
+            while self.running:
+                await asyncio.sleep(self.drive_period)
+                start = time.perf_counter()
+                if time.time() - self.sensor_time > self.sensor_timeout:
+                    continue
+                _, distances, angles = c.cone_map.nearest_in_sector(
+                    heading_deg=0.0, half_width_deg=25.0, max_range=5.0)
+                bridge.set_command(*drive_decision(self.sensor_direction, distances, angles))
+                self.stats["surus"].add(time.perf_counter() - start)
+        finally:
+            self.motor_bridge = None
+            await asyncio.get_running_loop().run_in_executor(None, bridge.close)
+
+    async def watchdog_task(self):
+        """Kayıp hedef bekçisi: hedef görünmüyorsa kurtarma adımlarını yürüt"""
+        c = self.controller
+        while self.running:
+            await asyncio.sleep(0.1)
+            start = time.perf_counter()
+            if c.mode != 0 and time.time() - self.last_target_time > c.recovery.lost_grace:
+                action, pan, tilt = c.recovery.update()
+                if action == "move":
+                    put_latest(self.servo_q, (pan, tilt))
+                    c.last_face_move_time = time.time()
+                elif action == "center":
+                    put_latest(self.servo_q, (90, 150))
+                    c.zoom_level = 1.0
+                    c.update_dead_zone()
+                    c.recovery.reset()
+            self.stats["bekci"].add(time.perf_counter() - start)
+
+    async def display_task(self):
+        """Ekran ve klavye; OpenCV GUI ana iş parçacığında kalmalı"""
+        c = self.controller
+        while self.running:
+            frame = await self.display_q.get()
+            start = time.perf_counter()
+
+            for x, y, w, h in self.target_boxes:
+                cv2.rectangle(frame, (x, y), (x + w, y + h), (255, 0, 0), 2)
+            if self.sensor_direction is not None:
+                cv2.putText(frame, f"Sensor yon: {self.sensor_direction}", (10, 155),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
+            bridge = self.motor_bridge
+            if bridge is not None:
+                link = "bagli" if bridge.link_alive() else "YOK"
+                state = "DUR" if bridge.stale else f"{bridge.steering}/{bridge.throttle}"
+                cv2.putText(frame, f"Motor: {link} {state}", (10, 175),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
+            frame = c.draw_interface(frame)
+            cv2.imshow(WINDOW_NAME, frame)
+
+            key = cv2.waitKey(1) & 0xFF
+            self.handle_key(key)
+            self.stats["ekran"].add(time.perf_counter() - start)
+
+    async def report_task(self):
+        while self.running:
+            await asyncio.sleep(self.report_interval)
+            print("--- Görev döngü süreleri ---")
+            for name, stats in self.stats.items():
+                print(stats.format(name))
+            if self.motor_bridge is not None:
+                print(self.motor_bridge.latency.format("motor komut->onay"))
+
+    # ---------------------------------------------------------------- girdi
+    def handle_key(self, key):
+        c = self.controller
+        if key == ord('q'):
+            self.running = False
+        elif key == ord(' '):
+            c.mode = (c.mode + 1) % 3
+            print(f"Mod değiştirildi: {MODES[c.mode]}")
+            self.last_target_time = time.time()
+            c.recovery.reset()
+            c.face_tracker.reset()
+        elif key == ord('c'):
+            put_latest(self.servo_q, (90, 150))
+            c.target_x = None
+            c.target_y = None
+            self.last_target_time = time.time()
+            c.recovery.reset()
+            c.face_tracker.release()
+        elif key == ord('+') or key == ord('='):
+            c.zoom_in()
+        elif key == ord('-'):
+            c.zoom_out()
+        elif key == ord('r'):
+            c.reset_zoom()
+        elif key == ord('a'):
+            c.toggle_auto_zoom()
+        elif key == ord('p'):
+            print(f"Yüz kilit politikası: {c.face_tracker.cycle_policy()}")
+
+    def mouse_callback(self, event, x, y, flags, param):
+        """Tıklama: bloklayan HTTP yerine servo kuyruğuna komut bırak"""
+        c = self.controller
+        if event == cv2.EVENT_LBUTTONDOWN and c.mode == 1:
+            if c.face_tracker.lock_at(x, y):
+                print(f"Yüz kilitlendi: #{c.face_tracker.locked_id}")
+            return
+        if event == cv2.EVENT_LBUTTONDOWN and c.click_mode and c.current_pan is not None:
+            pan, tilt = c.calculate_servo_position(
+                x, y, is_face_tracking=False, current=(c.current_pan, c.current_tilt))
+            print(f"Tıklanan nokta: ({x}, {y}) -> Pan: {pan}, Tilt: {tilt}")
+            put_latest(self.servo_q, (pan, tilt))
+            c.target_x = x
+            c.target_y = y
+
+    # ---------------------------------------------------------------- ana akış
+    async def main(self):
+        c = self.controller
+        # Kareler kuyruklarla başka iş parçacıklarına gidiyor; havuz tamponlarının
+        # üzerine yazılmasın diye kamera ve zoom her kareye yeni dizi ayırır
+        c.reuse_frame_buffers = False
+        if not c.initialize_camera():
+            return
+        c.start_inference_pool()
+
+        cv2.namedWindow(WINDOW_NAME)
+        cv2.setMouseCallback(WINDOW_NAME, self.mouse_callback)
+
+        if aiohttp is not None:
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=2))
+        else:
+            print("aiohttp yüklü değil, servo istekleri iş parçacığında gönderilecek")
+
+        self.running = True
+        tasks = [asyncio.create_task(coro) for coro in (
+            self.capture_task(), self.detection_task(), self.control_task(),
+            self.servo_task(), self.sensor_task(), self.drive_task(), self.watchdog_task(),
+            self.display_task(), self.report_task(),
+        )]
+
+        print(f"Asenkron kontrol başladı (kontrol tiki: {1.0 / self.control_period:.0f} Hz)")
+        try:
+            # Ekran görevi 'q' ile running=False yapınca hepsi durur
+            while self.running:
+                await asyncio.sleep(0.1)
+        finally:
+            self.running = False
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self.session is not None:
+                await self.session.close()
+            for ex in (self.capture_executor, self.detect_executor, self.io_executor):
+                ex.shutdown(wait=True)
+            c.cleanup()
+
+    def run(self):
+        asyncio.run(self.main())
+
+
+if __name__ == "__main__":
+    from kamera4 import PanTiltController
+
+    esp32_ip = "192.168.43.185"
+    sensor_port = None  # Örn. "/dev/ttyUSB0" (mesafe2.ino)
+    motor_port = None   # Örn. "/dev/ttyACM0" (motor_kontrol.ino) ya da sahte_motor.py yolu
+
+    controller = PanTiltController(esp32_ip)
+    runtime = AsyncControlRuntime(controller, control_hz=30, sensor_port=sensor_port,
+                                  motor_port=motor_port)
+
+    try:
+        runtime.run()
+    except KeyboardInterrupt:
+        print("Program sonlandırılıyor...")
@@ -0,0 +1,201 @@
+"""
+Ayrı süreçlerde YOLO çıkarımı.
+
+Kareler multiprocessing.shared_memory üzerindeki halka yuvalarına kopyalanır,
+işçi süreçler bu yuvaları kopyasız NumPy görünümü olarak okur ve geriye sadece
+küçük tespit dizileri döner (N x 6: x1, y1, x2, y2, conf, cls). Böylece 2.7 MB'lık
+kareler pickle edilmez, GIL ve PyTorch iş parçacıkları kamera/arayüz döngüsüyle
+yarışmaz.
+"""
+import multiprocessing as mp
+import queue
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def _empty_detections():
+    return np.zeros((0, 6), dtype=np.float32)
+
+
+def boxes_to_array(boxes):
+    """ultralytics Boxes nesnesini tek seferde (N, 6) NumPy dizisine çevir"""
+    if boxes is None or len(boxes) == 0:
+        return _empty_detections()
+    # GPU -> CPU kopyası kutu başına değil, tek seferde yapılır.
+    # data sütunları: x1, y1, x2, y2, [track_id], conf, cls
+    data = boxes.data.cpu().numpy()
+    return np.concatenate([data[:, :4], data[:, -2:]], axis=1).astype(np.float32)
+
+
+def _worker_main(model_path, shm_name, slot_bytes, task_q, result_q, conf):
+    """İşçi süreç: yuvadaki kareyi oku, modeli çalıştır, tespitleri geri gönder"""
+    from ultralytics import YOLO  # Model her süreçte ayrı yüklenir
+
+    model = YOLO(model_path)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    result_q.put(("hazir", dict(model.names)))
+
+    try:
+        while True:
+            task = task_q.get()
+            if task is None:
+                break
+
+            frame_id, slot, shape, imgsz = task
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+
+            kwargs = {"conf": conf, "verbose": False}
+            if imgsz:
+                kwargs["imgsz"] = imgsz
+
+            start = time.perf_counter()
+            try:
+                r = model.predict(frame, **kwargs)[0]
+                detections = boxes_to_array(r.boxes)
+            except Exception as e:
+                print(f"Çıkarım hatası (kare {frame_id}): {e}")
+                detections = _empty_detections()
+            elapsed = time.perf_counter() - start
+
+            # Görünüm bırakılmadan paylaşımlı bellek kapatılamaz
+            del frame
+            result_q.put(("sonuc", frame_id, slot, detections, elapsed, imgsz))
+    finally:
+        shm.close()
+
+
+class InferencePool:
+    def __init__(self, model_path="duba.pt", workers=2, slots=4,
+                 max_shape=(720, 1280, 3), conf=0.5):
+        self.model_path = model_path
+        self.worker_count = workers
+        self.slot_count = max(slots, workers)  # Her işçiye en az bir yuva
+        self.max_shape = max_shape
+        self.conf = conf
+
+        self.slot_bytes = int(np.prod(max_shape))
+        self.shm = None
+        self.processes = []
+        self.task_q = None
+        self.result_q = None
+
+        # Yuva yönetimi sadece ana süreçte yapılır
+        self.free_slots = []
+        self.pending = {}  # frame_id -> gönderim zamanı
+        self.next_frame_id = 0
+
+        self.names = {}
+        self.latest_frame_id = -1
+        self.latest_detections = _empty_detections()
+
+        # İstatistikler
+        self.dropped_frames = 0
+        self.last_latency = 0.0
+        self.last_inference_time = 0.0
+        self.last_imgsz = None
+
+    def start(self):
+        """Paylaşımlı belleği ayır ve işçi süreçleri başlat"""
+        ctx = mp.get_context("spawn")  # CUDA/PyTorch için fork güvenli değil
+        self.shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * self.slot_count)
+        self.free_slots = list(range(self.slot_count))
+        self.task_q = ctx.Queue()
+        self.result_q = ctx.Queue()
+
+        for _ in range(self.worker_count):
+            p = ctx.Process(
+                target=_worker_main,
+                args=(self.model_path, self.shm.name, self.slot_bytes,
+                      self.task_q, self.result_q, self.conf),
+                daemon=True,
+            )
+            p.start()
+            self.processes.append(p)
+
+        print(f"Çıkarım havuzu başlatıldı: {self.worker_count} işçi, {self.slot_count} yuva")
+
+    def slot_view(self, slot, shape):
+        """Yuvanın paylaşımlı bellek üzerindeki NumPy görünümü"""
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+
+    def submit(self, frame, imgsz=None):
+        """Kareyi boş bir yuvaya yaz ve işçilere gönder. Bloklamaz.
+
+        Boş yuva yoksa kare düşürülür ve None döner; yakalama döngüsü
+        hiçbir zaman çıkarımı beklemez.
+        """
+        self.poll()
+
+        if frame.nbytes > self.slot_bytes or frame.dtype != np.uint8:
+            print(f"Kare yuvaya sığmıyor: {frame.shape} {frame.dtype}")
+            return None
+
+        if not self.free_slots:
+            self.dropped_frames += 1
+            return None
+
+        slot = self.free_slots.pop()
+        np.copyto(self.slot_view(slot, frame.shape), frame)
+
+        frame_id = self.next_frame_id
+        self.next_frame_id += 1
+        self.pending[frame_id] = time.perf_counter()
+        self.task_q.put((frame_id, slot, frame.shape, imgsz))
+        return frame_id
+
+    def poll(self):
+        """Gelen sonuçları topla, yuvaları serbest bırak. Yeni sonuç sayısını döner"""
+        if self.result_q is None:
+            return 0
+
+        count = 0
+        while True:
+            try:
+                msg = self.result_q.get_nowait()
+            except queue.Empty:
+                break
+
+            if msg[0] == "hazir":
+                self.names = msg[1]
+                continue
+
+            _, frame_id, slot, detections, elapsed, imgsz = msg
+            self.free_slots.append(slot)
+            sent_at = self.pending.pop(frame_id, None)
+            count += 1
+
+            # Birden fazla işçi varsa sonuçlar sırasız gelebilir; eskisini yazma
+            if frame_id > self.latest_frame_id:
+                self.latest_frame_id = frame_id
+                self.latest_detections = detections
+                self.last_inference_time = elapsed
+                self.last_imgsz = imgsz
+                if sent_at is not None:
+                    self.last_latency = time.perf_counter() - sent_at
+
+        return count
+
+    def latest(self):
+        """En güncel tespitler: (frame_id, N x 6 dizi)"""
+        self.poll()
+        return self.latest_frame_id, self.latest_detections
+
+    def close(self):
+        """İşçileri durdur ve paylaşımlı belleği serbest bırak"""
+        if self.shm is None:
+            return
+
+        for _ in self.processes:
+            self.task_q.put(None)
+        for p in self.processes:
+            p.join(timeout=2)
+            if p.is_alive():
+                p.terminate()
+        self.processes = []
+
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = None
+        print(f"Çıkarım havuzu kapatıldı (düşürülen kare: {self.dropped_frames})")
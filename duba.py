@@ -1,10 +1,26 @@
+import time
+
 import cv2
 from ultralytics import YOLO
 
+from cikarim import boxes_to_array
+from duba_isleme import ConePostProcessor
+from hareket_kapisi import MotionGate
+from adaptif_boyut import AdaptiveImgsz
+from karo_tespit import TiledDetector
+from duba_harita import ConeMap
+from kamera_kaynak import CameraSource
+
 model = YOLO("duba.pt")
+processor = ConePostProcessor(model.names)
+gate = MotionGate()  # Sahne durağansa önceki dubalar kullanılır
+imgsz_policy = AdaptiveImgsz()  # Yakın dubalarda düşük, uzaklarda yüksek çözünürlük
+tiled = TiledDetector(model)  # Uzaktaki küçük dubalar için seyrek karolu geçiş
+cone_map = ConeMap()  # Görüş dışına çıkan dubalar da hatırlanır (kamera sabit, pan=90)
+cones = None
 
-cap = cv2.VideoCapture(0) #harici kamera icin 1
-if not cap.isOpened():
+cap = CameraSource(0)  # harici kamera icin 1; backend="gstreamer" ile donanim MJPEG cozumu
+if not cap.open():
     print("kamera yok")
     exit()
 
@@ -15,38 +31,37 @@ while True:
 
     h, w = frame.shape[:2]
 
-    results = model.predict(frame, conf=0.5, verbose=False)
-
-    cone_count = 0
-
-    for r in results:
-        boxes = r.boxes
-        for i in range(len(boxes)):
-            xyxy = boxes.xyxy[i].cpu().numpy()
-            cls_id = int(boxes.cls[i].cpu().numpy())
-
-            label = model.names[cls_id].lower().replace("-", "").replace(" ", "")
-            if label == "trafficcone":
-                cone_count += 1
+    if cones is None or gate.should_detect(frame):
+        min_obj_h = int(cones.obj_h.min()) if cones is not None and len(cones) else None
+        # Uzak dubaları karolar yakaladığı için tam kare geçişi varsayılanı aşmaz
+        imgsz = min(imgsz_policy.choose(min_obj_h, frame.shape), imgsz_policy.default_imgsz)
 
-                x1, y1, x2, y2 = map(int, xyxy)
-                obj_h = y2 - y1
-                cx = x1 + (x2 - x1) // 2
+        start = time.perf_counter()
+        results = model.predict(frame, conf=0.5, verbose=False, imgsz=imgsz)
+        imgsz_policy.record(imgsz, time.perf_counter() - start)
 
-                distance_m = 1000 / obj_h
-                offset_x = cx - (w / 2)
-                angle_deg = (offset_x / (w / 2)) * 30
+        # Kutular tek seferde NumPy'a alınır, filtre/uzaklık/açı vektörel hesaplanır
+        detections = tiled.merge(boxes_to_array(results[0].boxes), tiled.update(frame))
+        cones = processor.process(detections, w, names=results[0].names)
+        cone_map.prune()
+        cone_map.add_observations(cones.distance_m, cones.angle_deg)
+    cone_count = len(cones)
 
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                cv2.putText(frame, "Duba", (x1, y1 - 25),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-                cv2.putText(frame, f"Yon = {angle_deg:.1f} deg", (x1, y1 - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
-                cv2.putText(frame, f"Uzaklik = {distance_m:.2f} m", (x1, y2 + 20),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+    for (x1, y1, x2, y2), distance_m, angle_deg in zip(
+            cones.boxes.tolist(), cones.distance_m.tolist(), cones.angle_deg.tolist()):
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        cv2.putText(frame, "Duba", (x1, y1 - 25),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+        cv2.putText(frame, f"Yon = {angle_deg:.1f} deg", (x1, y1 - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+        cv2.putText(frame, f"Uzaklik = {distance_m:.2f} m", (x1, y2 + 20),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
 
     cv2.putText(frame, f"Duba Sayisi = {cone_count}", (10, 60),
                 cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
+    cone_map.draw(frame, origin=(w - 100, h - 100))
+    cv2.putText(frame, f"Harita: {len(cone_map)} duba", (w - 190, h - 20),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 165, 255), 1)
     cv2.putText(frame, "Cikmak icin Q'ya basin", (10, 30),
                 cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
 
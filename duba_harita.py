@@ -0,0 +1,206 @@
+"""
+Kalıcı yerel duba haritası.
+
+Her duba tespitinin uzaklık ve yön açısı (ve o anki pan açısı) araç
+koordinatlarına çevrilir: x ileri, y sol (metre). Aynı dubanın tekrar eden
+gözlemleri birleştirilir, dubalar ızgara indeksinde tutulur. Böylece görüş
+alanından çıkmış ya da pan-tilt kafanın başka yöne baktığı dubalar da
+"şu yöndeki en yakın dubalar" sorgusunda kullanılabilir.
+
+Izgara hücresi merge_radius'tan küçük olamaz; birleştirme ve sorgu sadece
+komşu / menzil içindeki hücrelere bakar, haritada yüzlerce duba olsa da sorgu
+milisaniyenin altında kalır. Aracın hareketi bilindiğinde apply_motion ile
+harita yeni araç konumuna taşınır; bilinmiyorsa eski dubalar max_age ile silinir.
+"""
+import math
+import time
+
+import cv2
+import numpy as np
+
+
+PAN_CENTER = 90  # Servo pan açısı bu değerdeyken kamera tam ileri bakar
+
+
+def observation_to_xy(distance_m, angle_deg, pan=PAN_CENTER):
+    """Uzaklık + yön (sağ pozitif) + pan -> araç koordinatları (x ileri, y sol)
+
+    Pan açısı arttıkça kamera sola döner (calculate_servo_position ile aynı yön).
+    """
+    yaw_left = np.radians((pan - PAN_CENTER) - np.asarray(angle_deg, dtype=np.float64))
+    d = np.asarray(distance_m, dtype=np.float64)
+    return np.stack([d * np.cos(yaw_left), d * np.sin(yaw_left)], axis=-1)
+
+
+class ConeMap:
+    def __init__(self, cell_size=2.0, merge_radius=0.6, range_merge_factor=0.05,
+                 max_age=30.0, max_range=40.0, capacity=1024, max_weight=10):
+        self.merge_radius = merge_radius
+        self.range_merge_factor = range_merge_factor  # Uzaktaki gözlemler daha belirsiz
+        self.cell_size = max(cell_size, merge_radius * 2)
+        self.max_age = max_age
+        self.max_range = max_range
+        self.max_weight = max_weight  # Eski gözlemlerin ağırlık sınırı (harita uyum sağlasın)
+
+        # Sabit kapasiteli diziler + boş yuva listesi
+        self.xy = np.zeros((capacity, 2), dtype=np.float64)
+        self.hits = np.zeros(capacity, dtype=np.int32)
+        self.last_seen = np.zeros(capacity, dtype=np.float64)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.free = list(range(capacity - 1, -1, -1))
+
+        # (ix, iy) -> {duba indeksi}
+        self.grid = {}
+
+    def __len__(self):
+        return int(self.active.sum())
+
+    # ---------------------------------------------------------------- indeks
+    def cell(self, x, y):
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    def _grid_add(self, i):
+        self.grid.setdefault(self.cell(*self.xy[i]), set()).add(i)
+
+    def _grid_remove(self, i):
+        key = self.cell(*self.xy[i])
+        cell = self.grid.get(key)
+        if cell is not None:
+            cell.discard(i)
+            if not cell:
+                del self.grid[key]
+
+    def _rebuild_grid(self):
+        self.grid = {}
+        for i in np.flatnonzero(self.active):
+            self._grid_add(i)
+
+    def _neighbors(self, x, y):
+        ix, iy = self.cell(x, y)
+        out = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                cell = self.grid.get((ix + dx, iy + dy))
+                if cell:
+                    out.extend(cell)
+        return out
+
+    # ---------------------------------------------------------------- ekleme
+    def add_observations(self, distances, angles, pan=PAN_CENTER, now=None):
+        """Bir karedeki dubaları haritaya işle; güncellenen/eklenen indeksleri döndür"""
+        now = time.time() if now is None else now
+        if len(distances) == 0:
+            return []
+
+        points = observation_to_xy(distances, angles, pan)
+        ranges = np.asarray(distances, dtype=np.float64)
+        updated = []
+
+        for (x, y), r in zip(points, ranges):
+            if r > self.max_range:
+                continue
+
+            radius = min(self.merge_radius + self.range_merge_factor * r, self.cell_size)
+            candidates = [i for i in self._neighbors(x, y) if i not in updated]
+            best = None
+            if candidates:
+                idx = np.asarray(candidates)
+                d2 = ((self.xy[idx] - (x, y)) ** 2).sum(axis=1)
+                k = int(np.argmin(d2))
+                if d2[k] <= radius * radius:
+                    best = int(idx[k])
+
+            if best is None:
+                if not self.free:
+                    self.prune(now, force_oldest=True)
+                if not self.free:
+                    continue
+                best = self.free.pop()
+                self.xy[best] = (x, y)
+                self.hits[best] = 1
+                self.active[best] = True
+            else:
+                # Ağırlıklı ortalama; ağırlık sınırı ile harita yavaşça uyum sağlar
+                self._grid_remove(best)
+                w = min(self.hits[best], self.max_weight)
+                self.xy[best] = (self.xy[best] * w + (x, y)) / (w + 1)
+                self.hits[best] += 1
+
+            self.last_seen[best] = now
+            self._grid_add(best)
+            updated.append(best)
+
+        return updated
+
+    def prune(self, now=None, force_oldest=False):
+        """max_age'den eski dubaları sil; force_oldest ise en az birini sil"""
+        now = time.time() if now is None else now
+        stale = self.active & (now - self.last_seen > self.max_age)
+        if force_oldest and not stale.any() and self.active.any():
+            ages = np.where(self.active, self.last_seen, np.inf)
+            stale[int(np.argmin(ages))] = True
+
+        for i in np.flatnonzero(stale):
+            self._grid_remove(i)
+            self.active[i] = False
+            self.free.append(int(i))
+        return int(stale.sum())
+
+    def apply_motion(self, dx, dy, dyaw_deg):
+        """Araç (dx ileri, dy sol) metre gidip dyaw_deg sola döndüyse haritayı taşı"""
+        c, s = math.cos(math.radians(-dyaw_deg)), math.sin(math.radians(-dyaw_deg))
+        p = self.xy[self.active] - (dx, dy)
+        self.xy[self.active] = p @ np.array([[c, s], [-s, c]])
+        self._rebuild_grid()
+
+    # ---------------------------------------------------------------- sorgu
+    def nearest_in_sector(self, heading_deg=0.0, half_width_deg=30.0, max_range=None, k=3,
+                          min_hits=2):
+        """heading_deg yönünde (sol pozitif) ±half_width_deg içindeki en yakın k duba
+
+        (indeksler, uzaklıklar, açılar) döner; açılar sol pozitif derece.
+        """
+        max_range = self.max_range if max_range is None else max_range
+        reach = int(math.ceil(max_range / self.cell_size))
+
+        # Dolu hücre sayısı menzil kutusundan azsa dolu hücreleri tara
+        if len(self.grid) < (2 * reach + 1) ** 2:
+            cand = [i for (ix, iy), cell in self.grid.items()
+                    if abs(ix) <= reach and abs(iy) <= reach for i in cell]
+        else:
+            cand = []
+            for ix in range(-reach, reach + 1):
+                for iy in range(-reach, reach + 1):
+                    cell = self.grid.get((ix, iy))
+                    if cell:
+                        cand.extend(cell)
+
+        if not cand:
+            return np.zeros(0, dtype=int), np.zeros(0), np.zeros(0)
+
+        idx = np.asarray(cand)
+        idx = idx[self.hits[idx] >= min_hits]  # Tek görülen (gürültü olabilecek) dubaları alma
+        pts = self.xy[idx]
+        dist = np.hypot(pts[:, 0], pts[:, 1])
+        ang = np.degrees(np.arctan2(pts[:, 1], pts[:, 0]))
+        diff = (ang - heading_deg + 180.0) % 360.0 - 180.0
+
+        mask = (dist <= max_range) & (np.abs(diff) <= half_width_deg)
+        idx, dist, ang = idx[mask], dist[mask], ang[mask]
+        order = np.argsort(dist)[:k]
+        return idx[order], dist[order], ang[order]
+
+    # ---------------------------------------------------------------- çizim
+    def draw(self, frame, origin=(1180, 620), scale=8.0, now=None):
+        """Kuş bakışı küçük harita (araç origin'de, ileri yukarı)"""
+        now = time.time() if now is None else now
+        ox, oy = origin
+        cv2.circle(frame, (ox, oy), 4, (255, 255, 255), -1)
+        for i in np.flatnonzero(self.active):
+            x, y = self.xy[i]
+            px, py = int(ox - y * scale), int(oy - x * scale)
+            # Yakın zamanda görülenler parlak, eskiler sönük
+            fresh = now - self.last_seen[i] < 1.0
+            color = (0, 165, 255) if fresh else (0, 90, 140)
+            cv2.circle(frame, (px, py), 3, color, -1)
+        return frame
@@ -0,0 +1,86 @@
+"""
+YOLO duba sonuçlarının vektörel son işlemesi.
+
+Kutular tek seferde NumPy'a taşınır (N x 6: x1, y1, x2, y2, conf, cls), sınıf
+isimleri bir kez normalize edilip duba sınıf ID kümesine çevrilir. Filtreleme,
+en iyi kutu seçimi, uzaklık ve açı hesabı dizi işlemleriyle yapılır; karede
+onlarca duba olsa da maliyet sabit kalır.
+"""
+import numpy as np
+
+from cikarim import boxes_to_array
+
+
+CONE_LABELS = ("trafficcone", "cone", "duba")
+
+DISTANCE_K = 1000.0   # uzaklık_m = DISTANCE_K / kutu_yüksekliği
+HALF_FOV_DEG = 30.0   # Kare kenarı merkezden bu kadar derece
+
+
+def normalize_label(name):
+    return str(name).lower().replace("-", "").replace(" ", "").replace("_", "")
+
+
+def cone_class_ids(names, labels=CONE_LABELS):
+    """names sözlüğünden duba sınıflarının ID dizisi (bir kez hesaplanır)"""
+    items = names.items() if isinstance(names, dict) else enumerate(names)
+    return np.array([int(i) for i, n in items if normalize_label(n) in labels], dtype=np.float32)
+
+
+class ConeDetections:
+    """Bir karedeki dubalar; her alan M uzunluklu dizi"""
+
+    def __init__(self, rows, frame_w, zoom=1.0):
+        self.rows = rows
+        self.boxes = rows[:, :4].astype(np.int32)
+        self.conf = rows[:, 4]
+
+        x1, y1, x2, y2 = self.boxes.T
+        self.cx = (x1 + x2) // 2
+        self.cy = (y1 + y2) // 2
+        self.obj_h = np.maximum(1, y2 - y1)  # sıfıra bölme koruması
+
+        # Yazılımsal zoom'da kutular büyür; 1x değerlerine geri çevir
+        self.distance_m = DISTANCE_K * zoom / self.obj_h
+        half_w = frame_w / 2
+        self.angle_deg = (self.cx - half_w) / half_w * HALF_FOV_DEG / zoom
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def best(self):
+        """En yüksek güvenli dubanın indeksi, duba yoksa None"""
+        if len(self.rows) == 0:
+            return None
+        return int(np.argmax(self.conf))
+
+
+class ConePostProcessor:
+    def __init__(self, names=None, labels=CONE_LABELS):
+        self.labels = labels
+        self.names = None
+        self.cone_ids = np.zeros(0, dtype=np.float32)
+        if names is not None:
+            self.set_names(names)
+
+    def set_names(self, names):
+        """Sınıf isimleri değiştiyse ID kümesini yeniden hesapla"""
+        if names is self.names:
+            return
+        self.names = names
+        self.cone_ids = cone_class_ids(names, self.labels)
+
+    def filter(self, detections):
+        """N x 6 tespitlerden sadece duba satırlarını döndür"""
+        if len(detections) == 0 or len(self.cone_ids) == 0:
+            return detections[:0]
+        return detections[np.isin(detections[:, 5], self.cone_ids)]
+
+    def process(self, detections, frame_w, zoom=1.0, names=None):
+        """N x 6 dizi (ya da ultralytics Boxes) -> ConeDetections"""
+        if names is not None:
+            self.set_names(names)
+        if not isinstance(detections, np.ndarray):
+            detections = boxes_to_array(detections)
+        return ConeDetections(self.filter(detections), frame_w, zoom)
@@ -0,0 +1,220 @@
+"""
+Maske tabanlı duba menzili (isteğe bağlı).
+
+Kutu yüksekliğinden uzaklık (DISTANCE_K / h) duba kısmen örtülünce ya da
+kutu kesilince bozulur. Burada takip edilen dubaların kutu çevresindeki küçük
+ROI'lerde maske çıkarılır ve:
+
+  1. Temas noktası: maskenin en alt noktası zemine değer. Kamera yüksekliği ve
+     tilt açısı bilindiğinden bu pikselin ışını zemin düzlemiyle kesiştirilir.
+     Dubanın üstü örtülse de alt kısmı göründükçe doğrudur.
+  2. Alan: temas noktası görünmüyorsa (alt kenar kesik, ufka çok yakın) maske
+     alanından d = f * sqrt(S / A). Dubanın görünür yüzey alanı S, temas
+     noktasından ölçülen karelerde kendiliğinden güncellenir.
+  3. İkisi de yoksa kutu yüksekliği sezgisi olduğu gibi kalır.
+
+Maske kaynağı kamera3.py'deki yolo11n-seg modelidir. Model COCO ile eğitildiği
+için "duba" sınıfı yoktur; ROI içinde kutuyla en çok örtüşen örnek sınıfına
+bakılmadan alınır. Örnek bulunamazsa turuncu HSV eşiklemesine dönülür.
+
+Maliyet: tam kare segmentasyon yapılmaz. interval karede bir, en yakın
+max_rois dubanın ROI'leri tek batch'te küçük imgsz ile işlenir; aradaki
+karelerde son menziller IoU eşleştirmesiyle dubalara taşınır.
+"""
+import math
+
+import cv2
+import numpy as np
+
+from karo_tespit import box_iou
+
+
+SEG_MODEL = "yolo11n-seg.pt"
+
+RANGE_BOX = 0
+RANGE_CONTACT = 1
+RANGE_AREA = 2
+
+# Turuncu duba rengi (OpenCV HSV: H 0-180)
+ORANGE_LOW = (0, 110, 90)
+ORANGE_HIGH = (22, 255, 255)
+
+
+class ConeFootprint:
+    def __init__(self, kinematics, model=None, model_path=SEG_MODEL, camera_height_m=0.5,
+                 interval=5, max_rois=4, roi_pad=0.2, imgsz=320, conf=0.25,
+                 min_depression_deg=2.0, cone_area_m2=0.1, max_age=15):
+        self.kinematics = kinematics  # Odak uzaklığı ve tilt -> yunuslama (kinematik.py)
+        self.model = model
+        self.model_path = model_path
+        self.camera_height_m = camera_height_m
+        self.interval = interval
+        self.max_rois = max_rois
+        self.roi_pad = roi_pad
+        self.imgsz = imgsz
+        self.conf = conf
+        self.min_depression = math.radians(min_depression_deg)  # Ufka bu kadar yakınsa temas güvenilmez
+        self.cone_area_m2 = cone_area_m2  # Temas ölçümlerinden güncellenir
+        self.max_age = max_age
+
+        self.calls = 0
+        # Son maske ölçümleri: kutular, menziller, yöntemler, temas noktaları, ölçüm çağrısı
+        self.cached_boxes = np.zeros((0, 4), dtype=np.float32)
+        self.cached_range = np.zeros(0)
+        self.cached_method = np.zeros(0, dtype=np.int8)
+        self.cached_contact = np.zeros((0, 2))
+        self.cached_call = None
+        self.mask_runs = 0
+
+    def _ensure_model(self):
+        if self.model is None:
+            from ultralytics import YOLO
+            self.model = YOLO(self.model_path)
+        return self.model
+
+    # ---------------------------------------------------------------- geometri
+    def contact_range(self, x, y, tilt, zoom, frame_w, frame_h):
+        """Zemin temas pikselinden yatay uzaklık (m); ışın zemine inmiyorsa None"""
+        k = self.kinematics
+        fx, fy = k.focal_px(frame_w, frame_h, zoom)
+        left = (frame_w / 2 + k.cx - x) / fx
+        up = (frame_h / 2 + k.cy - y) / fy
+
+        pitch = math.radians(k.tilt_level - tilt + k.tilt_offset_deg)
+        fwd_w = math.cos(pitch) - up * math.sin(pitch)
+        up_w = math.sin(pitch) + up * math.cos(pitch)
+
+        depression = math.atan2(-up_w, math.hypot(fwd_w, left))
+        if depression < self.min_depression:
+            return None
+        t = self.camera_height_m / -up_w
+        return math.hypot(fwd_w * t, left * t)
+
+    def area_range(self, area_px, zoom, frame_w, frame_h):
+        fx, fy = self.kinematics.focal_px(frame_w, frame_h, zoom)
+        return math.sqrt(fx * fy) * math.sqrt(self.cone_area_m2 / max(area_px, 1.0))
+
+    # ---------------------------------------------------------------- maske
+    def _seg_contours(self, crops, local_boxes):
+        """Her ROI için kutuyla en çok örtüşen seg örneğinin konturu (ya da None)"""
+        results = self._ensure_model().predict(crops, imgsz=self.imgsz, conf=self.conf,
+                                               verbose=False, retina_masks=False)
+        out = []
+        for r, box in zip(results, local_boxes):
+            if r.masks is None or len(r.masks.xy) == 0:
+                out.append(None)
+                continue
+            polys = [p for p in r.masks.xy if len(p) >= 3]
+            if not polys:
+                out.append(None)
+                continue
+            bounds = np.array([[p[:, 0].min(), p[:, 1].min(), p[:, 0].max(), p[:, 1].max()]
+                               for p in polys], dtype=np.float32)
+            iou = box_iou(box[None, :], bounds)[0]
+            k = int(np.argmax(iou))
+            out.append(polys[k].astype(np.float32) if iou[k] > 0.3 else None)
+        return out
+
+    @staticmethod
+    def _hsv_contour(crop, box):
+        """Turuncu piksellerin en büyük konturu; kutu alanının %15'inden küçükse None"""
+        hsv = cv2.cvtColor(crop, cv2.COLOR_BGR2HSV)
+        mask = cv2.inRange(hsv, ORANGE_LOW, ORANGE_HIGH)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((3, 3), np.uint8))
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            return None
+        c = max(contours, key=cv2.contourArea)
+        box_area = (box[2] - box[0]) * (box[3] - box[1])
+        if cv2.contourArea(c) < 0.15 * box_area:
+            return None
+        return c.reshape(-1, 2).astype(np.float32)
+
+    def measure(self, frame, cones, tilt, zoom):
+        """En yakın dubaların ROI'lerinde maske çıkar, menzilleri önbelleğe yaz"""
+        h, w = frame.shape[:2]
+        order = np.argsort(-cones.obj_h)[:self.max_rois]
+
+        crops, origins, local_boxes, boxes = [], [], [], []
+        for i in order:
+            x1, y1, x2, y2 = cones.boxes[i]
+            pad_x = int((x2 - x1) * self.roi_pad)
+            pad_y = int((y2 - y1) * self.roi_pad)
+            rx1, ry1 = max(0, x1 - pad_x), max(0, y1 - pad_y)
+            rx2, ry2 = min(w, x2 + pad_x), min(h, y2 + pad_y)
+            if rx2 - rx1 < 8 or ry2 - ry1 < 8:
+                continue
+            crops.append(frame[ry1:ry2, rx1:rx2])
+            origins.append((rx1, ry1))
+            local_boxes.append(np.array([x1 - rx1, y1 - ry1, x2 - rx1, y2 - ry1], dtype=np.float32))
+            boxes.append(cones.boxes[i])
+
+        if not crops:
+            return
+
+        contours = self._seg_contours(crops, local_boxes)
+        ranges, methods, contacts = [], [], []
+        for crop, (ox, oy), box, contour in zip(crops, origins, local_boxes, contours):
+            if contour is None:
+                contour = self._hsv_contour(crop, box)
+            rng, method, contact = None, RANGE_BOX, (np.nan, np.nan)
+            if contour is not None:
+                # En alttaki noktaların ortası temas noktası
+                bottom = contour[:, 1].max()
+                low = contour[contour[:, 1] >= bottom - 2]
+                cx, cy = float(low[:, 0].mean()) + ox, float(bottom) + oy
+                area = float(cv2.contourArea(contour))
+
+                # Alt kenar ROI / kare sınırındaysa temas noktası görünmüyor olabilir
+                cut = bottom >= crop.shape[0] - 2 and oy + crop.shape[0] >= h - 1
+                if not cut and tilt is not None:
+                    rng = self.contact_range(cx, cy, tilt, zoom, w, h)
+                if rng is not None:
+                    method, contact = RANGE_CONTACT, (cx, cy)
+                    # Görünür alanı temas ölçümünden güncelle (yavaş)
+                    fx, fy = self.kinematics.focal_px(w, h, zoom)
+                    measured = area * rng * rng / (fx * fy)
+                    self.cone_area_m2 += 0.1 * (measured - self.cone_area_m2)
+                elif area > 0:
+                    rng, method = self.area_range(area, zoom, w, h), RANGE_AREA
+            ranges.append(np.nan if rng is None else rng)
+            methods.append(method)
+            contacts.append(contact)
+
+        self.cached_boxes = np.asarray(boxes, dtype=np.float32)
+        self.cached_range = np.asarray(ranges, dtype=np.float64)
+        self.cached_method = np.asarray(methods, dtype=np.int8)
+        self.cached_contact = np.asarray(contacts, dtype=np.float64)
+        self.cached_call = self.calls
+        self.mask_runs += 1
+
+    # ---------------------------------------------------------------- ana giriş
+    def refine(self, frame, cones, tilt, zoom=1.0, force=False):
+        """cones.distance_m'i maske menzilleriyle güncelle (yerinde)
+
+        interval çağrıda bir maske ölçümü yapılır; aradaki çağrılarda önbellekteki
+        menziller kutu IoU'su ile eşleşen dubalara aktarılır.
+        """
+        self.calls += 1
+        cones.range_method = np.full(len(cones), RANGE_BOX, dtype=np.int8)
+        cones.contact = np.full((len(cones), 2), np.nan)
+        if len(cones) == 0:
+            return cones
+
+        if force or self.cached_call is None or self.calls - self.cached_call >= self.interval:
+            self.measure(frame, cones, tilt, zoom)
+        if self.cached_call is None or self.calls - self.cached_call > self.max_age:
+            return cones
+        if len(self.cached_boxes) == 0:
+            return cones
+
+        iou = box_iou(cones.boxes.astype(np.float32), self.cached_boxes)
+        best = iou.argmax(axis=1)
+        ok = (iou[np.arange(len(cones)), best] > 0.3) & ~np.isnan(self.cached_range[best])
+        if ok.any():
+            distance = cones.distance_m.astype(np.float64)
+            distance[ok] = self.cached_range[best[ok]]
+            cones.distance_m = distance
+            cones.range_method[ok] = self.cached_method[best[ok]]
+            cones.contact[ok] = self.cached_contact[best[ok]]
+        return cones
@@ -0,0 +1,245 @@
+"""
+Çoklu pan-tilt kafa (filo) yöneticisi.
+
+Tek bilgisayardan birden çok kamera + ESP32 pan-tilt kafası sürülür. Her kafa
+kendi PanTiltController'ıdır: kendi kamera kaynağı (CameraSource), kendi
+ESP32'sine kalıcı requests.Session bağlantısı ve kendi takip durumu. YOLO
+modeli kafalar arasında paylaşılır.
+
+    kameralar ──(kafa başına yakalama iş parçacığı, en son kare)──┐
+                                                                   v
+    ortak zamanlayıcı: sırası gelen ve yeni karesi olan kafada tespit + takip
+                                                                   v
+    servo komutları ortak ThreadPoolExecutor'da eşzamanlı (kafa başına en son komut)
+
+Kamera / ESP32 eşleşmesi JSON ile verilir (filo_ornek.json):
+
+    {"detect_hz": 0,
+     "heads": [{"name": "on", "esp32_ip": "192.168.43.185", "camera": 0, "mode": 2},
+               {"name": "sol", "esp32_ip": "192.168.43.186", "camera": 1, "mode": 1}]}
+
+mode: 0 tıklama, 1 yüz, 2 duba. detect_hz > 0 ise tüm kafaların toplam tespit
+hızı bununla sınırlanır (0 = sınırsız). Kafa başına yakalanan / işlenen FPS,
+tespit süresi, kare yaşı ve servo komut gecikmesi periyodik yazdırılır.
+
+    python filo.py filo.json
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+from ultralytics import YOLO
+
+from kamera4 import PanTiltController
+from olcum import LatencyStats
+
+
+MODES = ["Tıklama Modu", "Yüz Takip Modu", "Duba Takip Modu"]
+
+
+class Head:
+    """Bir kamera + bir ESP32 pan-tilt kafası"""
+
+    def __init__(self, name, controller, camera_index=0, mode=0):
+        self.name = name
+        self.controller = controller
+        self.camera_index = camera_index
+        self.controller.mode = mode
+        self.window = f"Kafa: {name}"
+
+        self.lock = threading.Lock()
+        self.frame = None
+        self.frame_time = 0.0
+        self.frame_seq = 0
+        self.processed_seq = 0
+        self.capture_thread = None
+
+        self.captured = 0
+        self.processed = 0
+        self.detect_stats = LatencyStats()
+        self.age_stats = LatencyStats()  # Yakalamadan işlenmeye kadar geçen süre
+
+    def open(self):
+        # Kare yakalama iş parçacığından ana döngüye geçtiği için tamponlar paylaşılmaz
+        self.controller.reuse_frame_buffers = False
+        return self.controller.initialize_camera(self.camera_index)
+
+    def capture_loop(self, running):
+        camera = self.controller.camera
+        while running.is_set():
+            ret, frame = camera.read()
+            if not ret:
+                print(f"{self.name}: kamera görüntüsü alınamıyor!")
+                time.sleep(0.1)
+                continue
+            with self.lock:
+                self.frame = frame
+                self.frame_time = time.perf_counter()
+                self.frame_seq += 1
+            self.captured += 1
+
+    def has_new_frame(self):
+        return self.frame_seq != self.processed_seq
+
+    def take_frame(self):
+        with self.lock:
+            self.processed_seq = self.frame_seq
+            return self.frame, self.frame_time
+
+    def process(self, frame, frame_time):
+        """Zoom + tespit + takip (servo komutu executor'a gider) + arayüz"""
+        c = self.controller
+        c.buffers.begin_frame()
+        start = time.perf_counter()
+        frame = c.apply_zoom(frame)
+        if c.mode == 1:
+            frame = c.detect_and_track_faces(frame)
+        elif c.mode == 2:
+            frame = c.detect_and_track_cone(frame)
+        done = time.perf_counter()
+
+        self.detect_stats.add(done - start)
+        self.age_stats.add(done - frame_time)
+        self.processed += 1
+        return c.draw_interface(frame)
+
+
+class RoundRobinScheduler:
+    """Tespit sırasını kafalar arasında dağıt; yeni karesi olmayan kafa atlanır"""
+
+    def __init__(self, heads, detect_hz=0.0):
+        self.heads = heads
+        self.index = -1
+        self.min_interval = 1.0 / detect_hz if detect_hz else 0.0
+        self.last_run = 0.0
+
+    def next(self):
+        if self.min_interval and time.perf_counter() - self.last_run < self.min_interval:
+            return None
+        n = len(self.heads)
+        for step in range(1, n + 1):
+            i = (self.index + step) % n
+            if self.heads[i].has_new_frame():
+                self.index = i
+                self.last_run = time.perf_counter()
+                return self.heads[i]
+        return None
+
+
+class FleetController:
+    def __init__(self, head_configs, detect_hz=0.0, report_interval=10.0, model_path="duba.pt"):
+        # Model bir kez yüklenir, tüm kafalar paylaşır
+        model = YOLO(model_path)
+
+        self.heads = []
+        for i, cfg in enumerate(head_configs):
+            controller = PanTiltController(
+                cfg.get("esp32_ip", "192.168.43.185"),
+                face_backend=cfg.get("face_backend", "haar"),
+                camera_backend=cfg.get("camera_backend", "auto"),
+                latency_budget_ms=None,  # Yük dengesini ortak zamanlayıcı yapar
+                model=model)
+            self.heads.append(Head(cfg.get("name", f"kafa{i}"), controller,
+                                   cfg.get("camera", i), cfg.get("mode", 0)))
+
+        # Tüm kafaların servo komutları eşzamanlı gider
+        self.servo_executor = ThreadPoolExecutor(max_workers=max(2, len(self.heads)))
+        for head in self.heads:
+            head.controller.servo_executor = self.servo_executor
+
+        self.scheduler = RoundRobinScheduler(self.heads, detect_hz)
+        self.report_interval = report_interval
+        self.running = threading.Event()
+
+    @classmethod
+    def from_config(cls, path):
+        with open(path) as f:
+            config = json.load(f)
+        return cls(config["heads"], detect_hz=config.get("detect_hz", 0.0),
+                   report_interval=config.get("report_interval", 10.0),
+                   model_path=config.get("model", "duba.pt"))
+
+    def report(self, elapsed):
+        print("--- Filo ---")
+        for head in self.heads:
+            c = head.controller
+            print(f"{head.name} ({c.esp32_ip}, {MODES[c.mode]}): yakalanan "
+                  f"{head.captured / elapsed:.1f} FPS | işlenen {head.processed / elapsed:.1f} FPS")
+            print("  " + head.detect_stats.format("tespit+takip"))
+            print("  " + head.age_stats.format("kare yaşı"))
+            print("  " + c.servo_stats.format("servo komutu"))
+            head.captured = 0
+            head.processed = 0
+
+    def run(self):
+        opened = [head for head in self.heads if head.open()]
+        if not opened:
+            print("Hiçbir kamera açılamadı")
+            return
+        self.heads = opened
+        self.scheduler.heads = opened
+
+        self.running.set()
+        for head in self.heads:
+            cv2.namedWindow(head.window)
+            cv2.setMouseCallback(head.window, head.controller.mouse_callback)
+            head.capture_thread = threading.Thread(target=head.capture_loop, args=(self.running,),
+                                                   daemon=True)
+            head.capture_thread.start()
+
+        print(f"Filo başladı: {', '.join(h.name for h in self.heads)}")
+        print("Kontroller: SPACE seçili kafanın modunu değiştir, 1-9 kafa seç, C merkez, Q çıkış")
+        selected = self.heads[0]
+        last_report = time.time()
+        try:
+            while self.running.is_set():
+                head = self.scheduler.next()
+                if head is None:
+                    time.sleep(0.001)
+                else:
+                    frame, frame_time = head.take_frame()
+                    cv2.imshow(head.window, head.process(frame, frame_time))
+
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord('q'):
+                    self.running.clear()
+                elif ord('1') <= key <= ord('9') and key - ord('1') < len(self.heads):
+                    selected = self.heads[key - ord('1')]
+                    print(f"Seçili kafa: {selected.name}")
+                elif key == ord(' '):
+                    c = selected.controller
+                    c.mode = (c.mode + 1) % 3
+                    c.recovery.reset()
+                    c.motion_gate.reset()
+                    c.face_tracker.reset()
+                    print(f"{selected.name}: {MODES[c.mode]}")
+                elif key == ord('c'):
+                    selected.controller.center_camera()
+
+                now = time.time()
+                if now - last_report >= self.report_interval:
+                    self.report(now - last_report)
+                    last_report = now
+        finally:
+            self.running.clear()
+            for head in self.heads:
+                if head.capture_thread is not None:
+                    head.capture_thread.join(timeout=1)
+            self.servo_executor.shutdown(wait=True)
+            for head in self.heads:
+                head.controller.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Çoklu pan-tilt kafa yöneticisi")
+    parser.add_argument("config", nargs="?", default="filo_ornek.json", help="Kafa yapılandırması (JSON)")
+    args = parser.parse_args()
+
+    fleet = FleetController.from_config(args.config)
+    try:
+        fleet.run()
+    except KeyboardInterrupt:
+        print("Program sonlandırılıyor...")
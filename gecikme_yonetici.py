@@ -0,0 +1,131 @@
+"""
+Gecikme bütçesi yöneticisi.
+
+Ana döngü yetişemediğinde her kare aynı işi yapmaya devam ederse FPS çöker ve
+takip geride kalır. LatencyGovernor her karenin işlem süresini (kamera
+beklemesi hariç) izler ve bütçe aşılırsa kademeli olarak iş bırakır:
+
+    0 tam              : her şey açık
+    1 arayuz_kapali    : draw_interface çizilmez
+    2 dusuk_cozunurluk : YOLO imgsz üst sınırı, yüz taraması küçük ölçekte,
+                         yazılımsal zoom en yakın komşu ile
+    3 kare_atlama      : tespit iki karede bir (arada son sonuçlar)
+    4 hafif            : tespit üç karede bir, yüzlerde Haar, karolu tarama
+                         ve maske menzili kapalı
+
+Seviyeler birikimlidir. Son window karenin medyanı bütçeyi aşarsa bir seviye
+aşağı inilir. Yukarı çıkmaya yalnızca tespit yapılan karelerin medyanı
+bütçenin up_ratio katının altına inince karar verilir: kare atlama
+seviyelerinde atlanan karelerin ucuz süreleri medyanı düşürüp yük azalmadan
+yukarı çıkılmasına (ve iki seviye arasında gidip gelmeye) yol açmasın.
+Her geçişten sonra hold_time boyunca ve yeni seviyede yeterli ölçüm
+toplanana kadar tekrar geçiş yapılmaz (seviyeler arasında gidip gelmesin).
+Her geçiş yazdırılır ve transitions listesinde tutulur.
+"""
+import time
+from collections import deque
+
+import numpy as np
+
+
+FULL_SETTINGS = {
+    "overlay": True,         # draw_interface çizilsin mi
+    "imgsz_cap": None,       # YOLO giriş boyutu üst sınırı
+    "face_scale": 1.0,       # Yüz tespiti ölçeği üst sınırı
+    "fast_zoom": False,      # Yazılımsal zoom INTER_NEAREST ile
+    "detect_every": 1,       # Tespit N karede bir
+    "light_backend": False,  # Haar, karolar ve maske kapalı
+}
+
+LEVELS = (
+    ("tam", {}),
+    ("arayuz_kapali", {"overlay": False}),
+    ("dusuk_cozunurluk", {"imgsz_cap": 416, "face_scale": 0.5, "fast_zoom": True}),
+    ("kare_atlama", {"detect_every": 2}),
+    ("hafif", {"detect_every": 3, "light_backend": True}),
+)
+
+
+class LatencyGovernor:
+    def __init__(self, budget_ms=60.0, window=30, up_ratio=0.6, hold_time=2.0, levels=LEVELS):
+        self.enabled = budget_ms is not None
+        self.budget = (budget_ms or 0.0) / 1000.0
+        self.window = window
+        self.up_ratio = up_ratio    # Bütçenin bu katının altındaysa bir seviye geri dön
+        self.hold_time = hold_time
+
+        # Birikimli ayarlar: her seviye öncekilerin üstüne eklenir
+        self.level_names = [name for name, _ in levels]
+        self.level_settings = []
+        settings = dict(FULL_SETTINGS)
+        for _, changes in levels:
+            settings = {**settings, **changes}
+            self.level_settings.append(settings)
+
+        self.level = 0
+        self.samples = deque(maxlen=window)
+        self.detect_samples = deque(maxlen=window)  # Yalnızca tespit yapılan kareler
+        self.last_change = 0.0
+        self.frame_count = 0
+        self.transitions = []  # (zaman, eski seviye, yeni seviye, medyan ms)
+
+    @property
+    def settings(self):
+        return self.level_settings[self.level]
+
+    @property
+    def level_name(self):
+        return self.level_names[self.level]
+
+    def should_detect(self):
+        """Kare atlama seviyesinde bu karede tespit yapılsın mı"""
+        every = self.settings["detect_every"]
+        return every <= 1 or self.frame_count % every == 0
+
+    def record(self, seconds, now=None, detected=None):
+        """Karenin işlem süresini ekle; seviye değiştiyse True
+
+        detected verilmezse bu karede should_detect() ne dediyse o kabul edilir.
+        """
+        if detected is None:
+            detected = self.should_detect()
+        self.frame_count += 1
+        if not self.enabled:
+            return False
+
+        now = time.time() if now is None else now
+        self.samples.append(seconds)
+        if detected:
+            self.detect_samples.append(seconds)
+        # Yeni seviyenin etkisi ölçülmeden tekrar karar verme
+        if len(self.samples) < self.window // 2 or now - self.last_change < self.hold_time:
+            return False
+
+        median = float(np.median(np.fromiter(self.samples, dtype=np.float64)))
+        if median > self.budget and self.level < len(self.level_settings) - 1:
+            return self._change(self.level + 1, median, now)
+
+        min_detections = max(1, self.window // (2 * self.settings["detect_every"]))
+        if self.level > 0 and len(self.detect_samples) >= min_detections:
+            detect_median = float(np.median(np.fromiter(self.detect_samples, dtype=np.float64)))
+            if detect_median < self.budget * self.up_ratio:
+                return self._change(self.level - 1, detect_median, now)
+        return False
+
+    def _change(self, level, median, now):
+        old = self.level
+        self.level = level
+        self.samples.clear()
+        self.detect_samples.clear()
+        self.last_change = now
+        self.transitions.append((now, old, level, median * 1000))
+        if level > old:
+            reason = f"> bütçe {self.budget * 1000:.0f} ms"
+        else:
+            reason = f"< {self.budget * self.up_ratio * 1000:.0f} ms"
+        print(f"Gecikme yöneticisi: {self.level_names[old]} -> {self.level_names[level]} "
+              f"(medyan {median * 1000:.1f} ms {reason})")
+        return True
+
+    def status_text(self):
+        return f"Yuk seviyesi: {self.level} ({self.level_name})"
@@ -0,0 +1,97 @@
+"""
+Hareket kapısı: sahne değişmediyse tespiti atla, önceki sonuçları kullan.
+
+Araç park halindeyken ya da pan-tilt kafa dururken YOLO / Haar neredeyse aynı
+kareler üzerinde tekrar tekrar çalışır. Burada kare küçük gri bir görüntüye
+indirilir ve son tespit yapılan kareyle piksel farkına bakılır. Değişen piksel
+oranı eşiğin altındaysa tespit atlanır.
+
+Şu durumlarda tespit her zaman yapılır:
+  - servolara yakın zamanda komut gönderildiyse (notify_camera_move),
+  - zoom değiştiyse,
+  - son tespitin üzerinden max_reuse_time geçtiyse (yavaş değişimler için).
+"""
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    def __init__(self, size=(160, 90), pixel_threshold=15, changed_fraction=0.005,
+                 max_reuse_time=2.0, servo_settle=0.5):
+        self.size = size                          # Karşılaştırma çözünürlüğü (g, y)
+        self.pixel_threshold = pixel_threshold    # Gri seviye farkı eşiği
+        self.changed_fraction = changed_fraction  # Değişen piksel oranı eşiği
+        self.max_reuse_time = max_reuse_time
+        self.servo_settle = servo_settle          # Servo komutundan sonra zorunlu tespit süresi
+
+        # Anahtar başına (yüz / duba) son tespit karesi: (gri, zoom, zaman)
+        self.references = {}
+        self.last_camera_move = float("-inf")
+
+        self.small = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        self.gray = np.empty((size[1], size[0]), dtype=np.uint8)
+        self.diff = np.empty((size[1], size[0]), dtype=np.uint8)
+
+        self.detect_count = 0
+        self.skip_count = 0
+
+    def notify_camera_move(self, now=None):
+        """Servolara komut gönderildi: sonraki karelerde yeni tespit zorunlu"""
+        self.last_camera_move = time.time() if now is None else now
+
+    def reset(self, key=None):
+        if key is None:
+            self.references.clear()
+        else:
+            self.references.pop(key, None)
+
+    def should_detect(self, frame, zoom=1.0, key="varsayilan", now=None, update=True):
+        """Tespit çalıştırılmalı mı? False ise önceki tespitler kullanılabilir
+
+        update=False ise referans güncellenmez; tespit gerçekten başlatıldıysa
+        (ör. çıkarım havuzu kareyi kabul ettiyse) ardından accept çağrılır.
+        """
+        now = time.time() if now is None else now
+
+        cv2.resize(frame, self.size, dst=self.small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self.small, cv2.COLOR_BGR2GRAY, dst=self.gray)
+
+        ref = self.references.get(key)
+        fresh = (
+            ref is None or
+            ref[1] != zoom or
+            now - self.last_camera_move < self.servo_settle or
+            now - ref[2] > self.max_reuse_time
+        )
+
+        if not fresh:
+            cv2.absdiff(self.gray, ref[0], dst=self.diff)
+            changed = np.count_nonzero(self.diff > self.pixel_threshold) / self.diff.size
+            fresh = changed > self.changed_fraction
+
+        if not fresh:
+            self.skip_count += 1
+            return False
+
+        self.detect_count += 1
+        if update:
+            self.accept(key, zoom, now)
+        return True
+
+    def accept(self, key="varsayilan", zoom=1.0, now=None):
+        """Son should_detect karesini key için referans yap"""
+        now = time.time() if now is None else now
+        # Referans sadece tespit yapılan karede güncellenir; yavaş kayma birikir
+        ref = self.references.get(key)
+        if ref is None:
+            self.references[key] = [self.gray.copy(), zoom, now]
+        else:
+            np.copyto(ref[0], self.gray)
+            ref[1] = zoom
+            ref[2] = now
+
+    def skip_ratio(self):
+        total = self.detect_count + self.skip_count
+        return self.skip_count / total if total else 0.0
@@ -0,0 +1,210 @@
+"""
+Kayıp hedef kurtarma: tahmin + tarama.
+
+Hedef kaybolunca sabit 5 saniye beklemek yerine:
+  1. Tahmin: son görülen açısal hız ile hedefin gittiği yer tahmin edilir ve
+     servolar doğrudan oraya çevrilir.
+  2. Tarama: tahmin edilen noktanın etrafında, hareket yönü önce gelecek şekilde
+     genişleyen bir pan/tilt tarama deseni zamanlanmış adımlarla gezilir.
+  3. Vazgeç: tarama da bulamazsa eski davranış (merkez + zoom sıfırlama).
+
+Tahmin ve tarama sırasında scan_mode True olur; dedektör bu sürede hızlı, düşük
+çözünürlüklü tarama yapabilir.
+"""
+import time
+from collections import deque
+
+import numpy as np
+
+from kinematik import PanTiltKinematics
+
+
+TRACKING = "takip"
+PREDICT = "tahmin"
+SEARCH = "tarama"
+GAVE_UP = "vazgecti"
+
+
+class TargetRecovery:
+    def __init__(self, pan_limits=(30, 290), tilt_limits=(45, 240),
+                 hfov_deg=60.0, vfov_deg=34.0,
+                 lost_grace=0.3,        # Bu kadar kısa kayıplar yok sayılır (tek kare kaçırma)
+                 predict_duration=0.8,  # Tahmin edilen noktada bekleme süresi
+                 max_extrapolation=1.0, # Hız en fazla bu kadar saniye ileri uzatılır
+                 dwell_time=0.5,        # Tarama noktası başına bekleme
+                 search_rings=2,
+                 history_window=0.6,
+                 kinematics=None):
+        self.pan_limits = pan_limits
+        self.tilt_limits = tilt_limits
+        # Piksel -> servo açısı dönüşümü (kalibrasyonla güncellenir, kinematik.py)
+        self.kinematics = kinematics or PanTiltKinematics(hfov_deg, vfov_deg)
+
+        self.lost_grace = lost_grace
+        self.predict_duration = predict_duration
+        self.max_extrapolation = max_extrapolation
+        self.dwell_time = dwell_time
+        self.search_rings = search_rings
+        self.history_window = history_window
+
+        # (zaman, hedef_pan, hedef_tilt) — hedefin servo açısı cinsinden konumu
+        self.history = deque(maxlen=30)
+
+        self.state = TRACKING
+        self.lost_since = None
+        self.state_since = 0.0
+        self.predicted = None
+        self.waypoints = []
+        self.waypoint_index = 0
+
+        # Yeniden yakalama süreleri (saniye)
+        self.reacquire_times = []
+
+    # ---------------------------------------------------------------- gözlem
+    def pixel_to_angles(self, x, y, pan, tilt, zoom, frame_w, frame_h):
+        """Piksel konumunu hedefin mutlak servo açısına çevir"""
+        return self.kinematics.pixel_to_angles(x, y, pan, tilt, zoom, frame_w, frame_h)
+
+    def observe(self, x, y, pan, tilt, zoom, frame_w, frame_h, now=None):
+        """Hedef görüldü: geçmişe ekle, kayıptaysa yeniden yakalama süresini kaydet"""
+        now = time.time() if now is None else now
+
+        if self.lost_since is not None and self.state != TRACKING:
+            elapsed = now - self.lost_since
+            self.reacquire_times.append(elapsed)
+            print(f"Hedef yeniden bulundu: {elapsed:.2f}s ({self.state}) | "
+                  f"medyan: {self.median_reacquire_time():.2f}s")
+
+        self.history.append((now,) + self.pixel_to_angles(x, y, pan, tilt, zoom, frame_w, frame_h))
+        self.state = TRACKING
+        self.lost_since = None
+
+    def velocity(self):
+        """Son history_window içindeki açısal hız (derece/s), en küçük kareler"""
+        last_t = self.history[-1][0]
+        samples = [s for s in self.history if last_t - s[0] <= self.history_window]
+        if len(samples) < 3:
+            return 0.0, 0.0
+
+        arr = np.asarray(samples, dtype=np.float64)
+        t = arr[:, 0] - arr[:, 0].mean()
+        denom = float((t * t).sum())
+        if denom <= 1e-9:
+            return 0.0, 0.0
+        v_pan = float((t * (arr[:, 1] - arr[:, 1].mean())).sum() / denom)
+        v_tilt = float((t * (arr[:, 2] - arr[:, 2].mean())).sum() / denom)
+        return v_pan, v_tilt
+
+    # ---------------------------------------------------------------- kayıp
+    @property
+    def scan_mode(self):
+        """Dedektör hızlı düşük çözünürlüklü taramaya geçmeli mi"""
+        return self.state in (PREDICT, SEARCH)
+
+    def clamp(self, pan, tilt):
+        pan = max(self.pan_limits[0], min(self.pan_limits[1], pan))
+        tilt = max(self.tilt_limits[0], min(self.tilt_limits[1], tilt))
+        return int(round(pan)), int(round(tilt))
+
+    def build_search_pattern(self, center, direction):
+        """Tahmin noktası etrafında genişleyen tarama noktaları (hareket yönü önce)"""
+        step_pan = self.kinematics.hfov_deg * 0.7   # Komşu bakışlar biraz örtüşsün
+        step_tilt = self.kinematics.vfov_deg * 0.7
+        sign = 1 if direction >= 0 else -1
+
+        points = []
+        for k in range(1, self.search_rings + 1):
+            for dp in (sign * k * step_pan, -sign * k * step_pan):
+                for dt in (0.0, k * step_tilt, -k * step_tilt):
+                    points.append(self.clamp(center[0] + dp, center[1] + dt))
+            # Halkanın ortasındaki dikey noktalar
+            points.append(self.clamp(center[0], center[1] + k * step_tilt))
+            points.append(self.clamp(center[0], center[1] - k * step_tilt))
+
+        # Limitlere kırpılınca çakışan noktaları at
+        unique = []
+        for p in points:
+            if p not in unique and p != self.clamp(*center):
+                unique.append(p)
+        return unique
+
+    def update(self, now=None):
+        """Hedef görülmediğinde her karede çağrılır.
+
+        (eylem, pan, tilt) döner: eylem "move" (servoları çevir), "center"
+        (vazgeç, merkeze dön) ya da None (bekle).
+        """
+        now = time.time() if now is None else now
+
+        if self.lost_since is None:
+            if not self.history:
+                return None, None, None
+            self.lost_since = self.history[-1][0]
+
+        lost_for = now - self.lost_since
+
+        if self.state == TRACKING:
+            if lost_for < self.lost_grace:
+                return None, None, None
+
+            _, last_pan, last_tilt = self.history[-1]
+            v_pan, v_tilt = self.velocity()
+            lead = min(lost_for + self.predict_duration / 2, self.max_extrapolation)
+            self.predicted = (last_pan + v_pan * lead, last_tilt + v_tilt * lead)
+            self.waypoints = self.build_search_pattern(self.predicted, v_pan)
+            self.waypoint_index = 0
+            self.state = PREDICT
+            self.state_since = now
+
+            pan, tilt = self.clamp(*self.predicted)
+            print(f"Hedef kayboldu, tahmini konuma dönülüyor: Pan={pan}, Tilt={tilt} "
+                  f"(hız: {v_pan:.1f}, {v_tilt:.1f} derece/s)")
+            return "move", pan, tilt
+
+        if self.state == PREDICT:
+            if now - self.state_since < self.predict_duration:
+                return None, None, None
+            self.state = SEARCH
+            self.state_since = now - self.dwell_time  # İlk tarama noktasına hemen geç
+
+        if self.state == SEARCH:
+            if now - self.state_since < self.dwell_time:
+                return None, None, None
+            if self.waypoint_index >= len(self.waypoints):
+                self.state = GAVE_UP
+                print(f"Tarama sonuçsuz ({lost_for:.1f}s), merkeze dönülüyor...")
+                return "center", None, None
+
+            pan, tilt = self.waypoints[self.waypoint_index]
+            self.waypoint_index += 1
+            self.state_since = now
+            return "move", pan, tilt
+
+        return None, None, None
+
+    def reset(self):
+        """Mod değişimi / manuel merkezleme: geçmişi unut"""
+        self.history.clear()
+        self.state = TRACKING
+        self.lost_since = None
+        self.predicted = None
+        self.waypoints = []
+        self.waypoint_index = 0
+
+    def status_text(self, now=None):
+        """Ekranda gösterilecek durum"""
+        now = time.time() if now is None else now
+        if self.state == PREDICT:
+            return "HEDEF KAYBOLDU - TAHMINI KONUMA BAKILIYOR"
+        if self.state == SEARCH:
+            return f"HEDEF ARANIYOR - tarama {self.waypoint_index}/{len(self.waypoints)}"
+        if self.state == GAVE_UP:
+            return "HEDEF BULUNAMADI - MERKEZ"
+        if self.lost_since is not None:
+            return f"Hedef aranıyor... {now - self.lost_since:.1f}s"
+        return None
+
+    def median_reacquire_time(self):
+        if not self.reacquire_times:
+            return 0.0
+        return float(np.median(self.reacquire_times))
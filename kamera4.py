@@ -1,22 +1,59 @@
 import cv2
 import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 import threading
 import time
 import json
 from ultralytics import YOLO
 
+from cikarim import InferencePool, boxes_to_array
+from hedef_arama import TargetRecovery
+from zoom_kontrol import ZoomController
+from duba_isleme import ConePostProcessor
+from hareket_kapisi import MotionGate
+from adaptif_boyut import AdaptiveImgsz
+from karo_tespit import TiledDetector
+from duba_harita import ConeMap
+from yuz_tespit import create_face_detector
+from yuz_takip import FaceTracker
+from kamera_kaynak import CameraSource
+from kinematik import PanTiltKinematics, calibrate
+from duba_maske import ConeFootprint, RANGE_CONTACT, RANGE_AREA
+from gecikme_yonetici import LatencyGovernor
+from tampon_havuzu import BufferPool
+from olcum import LatencyStats
+
 
 class PanTiltController:
-    def __init__(self, esp32_ip="192.168.43.185"):  # ESP32'nizin IP adresini buraya yazın
-        
-        self.model = YOLO("duba.pt")
+    def __init__(self, esp32_ip="192.168.43.185", inference_workers=0, face_backend="haar",
+                 face_policy="largest", camera_backend="auto", cone_segmentation=False,
+                 latency_budget_ms=60.0, model=None, trace_allocations=False):  # ESP32'nizin IP adresini buraya yazın
+        
+        # Birden çok kafa aynı modeli paylaşabilir (filo.py)
+        self.model = model if model is not None else YOLO("duba.pt")
+        # inference_workers > 0 ise YOLO ayrı süreçlerde çalışır (cikarim.py)
+        self.inference_workers = inference_workers
+        self.inference_pool = None
+        # Sınıf isimleri bir kez duba ID kümesine çevrilir
+        self.cone_processor = ConePostProcessor(self.model.names)
         self.cone_tracking = False
         self.mode = 0  #mod degiskeni
         self.click_mode = True 
 
         self.esp32_ip = esp32_ip
+        # ESP32'ye kalıcı (keep-alive) bağlantı: her komutta yeni TCP bağlantısı açılmaz
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        # servo_executor verilirse pozisyon komutları beklenmeden gönderilir (filo.py)
+        self.servo_executor = None
+        self.servo_lock = threading.Lock()
+        self.servo_in_flight = False
+        self.pending_servo = None
+        self.servo_stats = LatencyStats()
         self.camera = None
+        # "auto", "v4l2" (MJPG + küçük tampon) ya da "gstreamer" (kamera_kaynak.py)
+        self.camera_backend = camera_backend
         self.running = False
         self.target_x = None
         self.target_y = None
@@ -31,26 +68,34 @@ class PanTiltController:
         self.zoom_max = 5.0
         self.zoom_step = 0.2
         
-        # Yüz tanıma için cascade classifier
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        # Kamera, zoom ve yüz tespiti aşamaları için önceden ayrılmış tamponlar (dst=)
+        # trace_allocations: tüm hattın kare başına ayırmasını tracemalloc ile ölç (yavaş)
+        self.buffers = BufferPool(trace=trace_allocations)
+        # Kareler tek döngüde sırayla işlenirken tamponlar güvenle yeniden kullanılır;
+        # kareyi başka iş parçacığına veren çalışma zamanları bunu kapatmalı
+        self.reuse_frame_buffers = True
+
+        # Yüz dedektörü: "haar", "yunet" ya da "auto" (yuz_benchmark.py seçimi)
+        self.face_detector = create_face_detector(face_backend, pool=self.buffers)
+        self.light_face_detector = None  # Yük altında kullanılan Haar (gerekince oluşturulur)
+        # Yüzlere kimlik verip tek kişiye kilitlenir: "largest", "first_seen", "center", "clicked"
+        self.face_tracker = FaceTracker(policy=face_policy)
         
         # Yüz takibi için kontrol parametreleri - YAVASLATILDI
         self.last_face_move_time = 0
         self.face_move_interval = 0.3  # Minimum 300ms bekle her hareket arasında
         self.face_dead_zone = 80  # Merkez bölgede bu kadar piksel tolerans
+        self.face_track_gain = 0.6  # Yüz takibinde açısal hatanın bu kadarı tek adımda düzeltilir
         
         # Otomatik zoom ve boyut kontrolü
         self.target_face_width = 200  # İdeal yüz genişliği (piksel)
         self.min_face_width = 80      # Bu boyuttan küçükse zoom at
         self.max_face_width = 400     # Bu boyuttan büyükse zoom out
         self.auto_zoom_enabled = True  # Otomatik zoom aktif/pasif
-        self.last_auto_zoom_time = 0
-        self.auto_zoom_interval = 1.0  # 1 saniye ara ile zoom ayarı
-        
-        # Kayıp hedef takip sistemi
-        self.last_face_detection_time = time.time()
-        self.no_face_timeout = 5.0  # 5 saniye hedef göremezse merkeze dön
-        self.lost_target_recovery = False
+        self.target_cone_height = 150  # İdeal duba yüksekliği (piksel)
+        # Her karede hedef boyutundan zoom hesaplayan yumuşak rampa
+        self.zoom_controller = ZoomController(self.zoom_min, self.zoom_max)
+        self.last_reported_zoom = self.zoom_level
         
         # Servo sınırları (güvenlik için)
         self.pan_min = 30   # Sol limit
@@ -58,34 +103,80 @@ class PanTiltController:
         self.tilt_min = 45  # Alt limit (fazla geriye gitmesin)
         self.tilt_max = 240 # Üst limit
 
-    def auto_adjust_zoom(self, face_width):
-        """Yüz boyutuna göre otomatik zoom ayarı"""
+        # Piksel -> servo açısı: görüş açısı + zoom + montaj kaçıklığı (K tuşu ile kalibrasyon)
+        self.kinematics = PanTiltKinematics.load()
+
+        # Kayıp hedef kurtarma: hız tahmini + tarama deseni, sonuçsuzsa merkeze dön
+        self.recovery = TargetRecovery(pan_limits=(self.pan_min, self.pan_max),
+                                       tilt_limits=(self.tilt_min, self.tilt_max),
+                                       kinematics=self.kinematics)
+        self.scan_scale = 0.5   # Kurtarma sırasında yüz taraması bu ölçekte yapılır
+        self.scan_imgsz = 320   # Kurtarma sırasında YOLO giriş boyutu
+
+        # Sahne değişmediyse tespiti atla, son sonuçları kullan
+        self.motion_gate = MotionGate()
+        self.last_faces = []
+        self.last_cones = None
+
+        # En küçük dubanın boyuna göre YOLO giriş boyutu seçimi
+        self.imgsz_policy = AdaptiveImgsz()
+        self.last_pool_frame_id = -1
+
+        # Uzak dubalar için karolu tespit (T tuşu); tam kare geçişinden seyrek çalışır
+        self.tiled_detector = TiledDetector(self.model)
+        self.tiled_enabled = False
+
+        # Araç koordinatlarında kalıcı duba haritası (görüş dışına çıkan dubalar unutulmaz)
+        self.cone_map = ConeMap()
+        self.mapped_cones = None
+        self.mapped_pool_frame_id = -1
+
+        # Duba menzili için maske temas noktası / alanı (M tuşu); seg modeli ilk kullanımda yüklenir
+        self.cone_footprint = ConeFootprint(self.kinematics)
+        self.segmentation_enabled = cone_segmentation
+
+        # Kare işlem süresi bütçeyi aşarsa arayüz / çözünürlük / tespit sıklığı kademeli düşer
+        self.governor = LatencyGovernor(latency_budget_ms)
+
+        # ESP32'den gelen son bilinen servo pozisyonu (bilinmiyorsa None)
+        self.current_pan = None
+        self.current_tilt = None
+        # Ulaşılamayan ESP32'ye her karede bloklayan /status sorgusu atılmasın
+        self.status_retry_interval = 5.0
+        self.last_status_query = None
+
+    def auto_adjust_zoom(self, size, target_size=None, center=None, measured_zoom=None):
+        """Hedef boyutuna göre otomatik zoom ayarı (her karede küçük adımlarla)
+
+        size: yüz genişliği ya da duba yüksekliği, target_size: ideal boyut
+        (varsayılan target_face_width), center: hedefin kare içindeki merkezi.
+        """
         if not self.auto_zoom_enabled:
             return
-        
-        current_time = time.time()
-        if (current_time - self.last_auto_zoom_time) < self.auto_zoom_interval:
-            return  # Çok sık zoom ayarı yapma
-        
-        zoom_changed = False
-        
-        # Yüz çok küçükse zoom in
-        if face_width < self.min_face_width and self.zoom_level < self.zoom_max:
-            self.zoom_level = min(self.zoom_max, self.zoom_level + 0.1)
-            zoom_changed = True
-            print(f"🔍 Hedef küçük, zoom in: {self.zoom_level:.1f}x (yüz genişlik: {face_width}px)")
-        
-        # Yüz çok büyükse zoom out
-        elif face_width > self.max_face_width and self.zoom_level > self.zoom_min:
-            self.zoom_level = max(self.zoom_min, self.zoom_level - 0.1)
-            zoom_changed = True
-            print(f"🔍 Hedef büyük, zoom out: {self.zoom_level:.1f}x (yüz genişlik: {face_width}px)")
-        
-        if zoom_changed:
-            self.last_auto_zoom_time = current_time
+
+        if target_size is None:
+            target_size = self.target_face_width
+
+        center_offset = 0.0
+        if center is not None:
+            center_offset = max(abs(center[0] - self.frame_width / 2) / (self.frame_width / 2),
+                                abs(center[1] - self.frame_height / 2) / (self.frame_height / 2))
+
+        new_zoom = self.zoom_controller.update(
+            self.zoom_level, size, target_size, measured_zoom=measured_zoom,
+            last_servo_move=self.last_face_move_time, center_offset=center_offset)
+
+        if new_zoom != self.zoom_level:
+            self.zoom_level = new_zoom
             # Zoom değiştiğinde dead zone'u da güncelle
             self.update_dead_zone()
 
+            if abs(self.zoom_level - self.last_reported_zoom) >= 0.5:
+                direction = "zoom in" if self.zoom_level > self.last_reported_zoom else "zoom out"
+                print(f"🔍 Otomatik {direction}: {self.zoom_level:.1f}x "
+                      f"(hedef boyut: {size}px, ideal: {target_size}px)")
+                self.last_reported_zoom = self.zoom_level
+
     def update_dead_zone(self):
         """Zoom seviyesine göre dead zone'u güncelle"""
         # Zoom arttıkça dead zone küçülsün (daha hassas olsun)
@@ -96,13 +187,12 @@ class PanTiltController:
         
     def initialize_camera(self, camera_index=0):    
         """Kamerayı başlat"""
-        self.camera = cv2.VideoCapture(camera_index)
-        if not self.camera.isOpened():
+        pool = self.buffers if self.reuse_frame_buffers else None
+        self.camera = CameraSource(camera_index, backend=self.camera_backend,
+                                   width=self.frame_width, height=self.frame_height, pool=pool)
+        if not self.camera.open():
             print(f"Kamera {camera_index} açılamadı!")
             return False
-            
-        self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.frame_width)
-        self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.frame_height)
         
         # Zoom desteği için kamera özelliklerini kontrol et
         try:
@@ -131,25 +221,38 @@ class PanTiltController:
         
         # Kırp ve boyutlandır
         cropped = frame[start_y:start_y + new_h, start_x:start_x + new_w]
-        zoomed = cv2.resize(cropped, (w, h), interpolation=cv2.INTER_LINEAR)
+        interpolation = cv2.INTER_NEAREST if self.governor.settings["fast_zoom"] else cv2.INTER_LINEAR
+        dst = self.buffers.get("zoom", frame.shape) if self.reuse_frame_buffers else None
+        zoomed = cv2.resize(cropped, (w, h), dst=dst, interpolation=interpolation)
         
         return zoomed
     
     def send_servo_command(self, pan=None, tilt=None):
         """ESP32'ye servo komutları gönder"""
+        if pan is not None and tilt is not None:
+            # Kamera hareket edecek: hareket kapısı yeni tespit istesin
+            self.motion_gate.notify_camera_move()
+            if self.servo_executor is not None:
+                self.submit_servo_command(pan, tilt)
+                return None
+
         try:
+            start = time.perf_counter()
             if pan is not None and tilt is not None:
                 # Direkt pozisyon gönder
                 url = f"http://{self.esp32_ip}/control"
                 data = {"pan": pan, "tilt": tilt}
-                response = requests.post(url, data=data, timeout=2)
+                response = self.session.post(url, data=data, timeout=2)
             else:
                 # Durum bilgisi al
                 url = f"http://{self.esp32_ip}/status"
-                response = requests.get(url, timeout=2)
+                response = self.session.get(url, timeout=2)
+            self.servo_stats.add(time.perf_counter() - start)
             
             if response.status_code == 200:
-                return response.json()
+                status = response.json()
+                self.update_servo_state(status)
+                return status
             else:
                 print(f"ESP32 yanıt hatası: {response.status_code}")
                 return None
@@ -157,56 +260,92 @@ class PanTiltController:
         except requests.exceptions.RequestException as e:
             print(f"ESP32 bağlantı hatası: {e}")
             return None
+
+    def submit_servo_command(self, pan, tilt):
+        """Komutu servo_executor'da gönder; önceki komut sürüyorsa sadece en sonuncusu bekler"""
+        with self.servo_lock:
+            self.pending_servo = (pan, tilt)
+            if self.servo_in_flight:
+                return
+            self.servo_in_flight = True
+        self.servo_executor.submit(self._drain_servo_commands)
+
+    def _drain_servo_commands(self):
+        while True:
+            with self.servo_lock:
+                command = self.pending_servo
+                self.pending_servo = None
+                if command is None:
+                    self.servo_in_flight = False
+                    return
+            pan, tilt = command
+            try:
+                start = time.perf_counter()
+                response = self.session.post(f"http://{self.esp32_ip}/control",
+                                             data={"pan": pan, "tilt": tilt}, timeout=2)
+                self.servo_stats.add(time.perf_counter() - start)
+                if response.status_code == 200:
+                    self.update_servo_state(response.json())
+                else:
+                    print(f"ESP32 yanıt hatası ({self.esp32_ip}): {response.status_code}")
+            except (requests.exceptions.RequestException, ValueError) as e:
+                print(f"ESP32 bağlantı hatası ({self.esp32_ip}): {e}")
     
-    def calculate_servo_position(self, x, y, is_face_tracking=False):
-        """Tıklanan koordinatları servo pozisyonlarına çevir - YAVASLATILDI + Dinamik hız"""
-        # Kamera merkezini hesapla
-        center_x = self.frame_width // 2
-        center_y = self.frame_height // 2
-        
-        # Mevcut servo pozisyonlarını al
-        status = self.send_servo_command()
-        if not status:
-            return 90, 90  # Varsayılan merkez pozisyon
-        
-        current_pan = status.get('pan', 90)
-        current_tilt = status.get('tilt', 90)
-        
-        # Koordinat farkını hesapla (eksenleri ters çevir)
-        diff_x = center_x - x  # X eksenini ters çevir (sol-sağ)
-        diff_y = y - center_y  # Y eksenini ters çevir (yukarı-aşağı)
-        
-        # Zoom seviyesine göre dinamik hız ayarı
-        zoom_speed_factor = 1.0 / self.zoom_level  # Zoom arttıkça hız azalır
-        
-        # Hassasiyet ayarları - YARILANDI + ZOOMa göre ayarlandı
-        if is_face_tracking:
-            # Yüz takibi için çok daha yavaş hareket + zoom faktörü
-            base_pan_sensitivity = 0.04   # Temel hız
-            base_tilt_sensitivity = 0.02  # Temel hız
-            pan_sensitivity = base_pan_sensitivity * zoom_speed_factor
-            tilt_sensitivity = base_tilt_sensitivity * zoom_speed_factor
-        else:
-            # Normal tıklama için daha yavaş + zoom faktörü
-            base_pan_sensitivity = 0.15   # Temel hız
-            base_tilt_sensitivity = 0.15  # Temel hız
-            pan_sensitivity = base_pan_sensitivity * zoom_speed_factor
-            tilt_sensitivity = base_tilt_sensitivity * zoom_speed_factor
-        
-        # Yeni pozisyonları hesapla
-        new_pan = current_pan + (diff_x * pan_sensitivity)
-        new_tilt = current_tilt + (diff_y * tilt_sensitivity)
+    def update_servo_state(self, status):
+        """ESP32 yanıtındaki pan/tilt değerlerini sakla"""
+        if status and 'pan' in status and 'tilt' in status:
+            self.current_pan = status['pan']
+            self.current_tilt = status['tilt']
+
+    def get_servo_position(self):
+        """Son bilinen servo pozisyonu; bilinmiyorsa ESP32'yi en fazla status_retry_interval'da bir sorgula"""
+        if self.current_pan is None:
+            now = time.time()
+            if self.last_status_query is None or now - self.last_status_query >= self.status_retry_interval:
+                self.last_status_query = now
+                if self.servo_executor is not None:
+                    # Ortak döngü bloklanmasın; yanıt gelene kadar varsayılan pozisyon kullanılır
+                    self.servo_executor.submit(self.send_servo_command)
+                else:
+                    self.send_servo_command()
+        if self.current_pan is None:
+            return 90, 150
+        return self.current_pan, self.current_tilt
+
+    def calculate_servo_position(self, x, y, is_face_tracking=False, current=None, zoom=None):
+        """Piksel koordinatını tek komutta oraya bakan servo pozisyonuna çevir
+
+        Görüş açısı, zoom ve montaj kaçıklığı kinematik modelden gelir (kinematik.py).
+        Tıklamada nokta doğrudan merkeze alınır; yüz takibinde tespit gecikmesi
+        yüzünden aşmamak için açısal hatanın face_track_gain kadarı uygulanır.
+        current=(pan, tilt) verilmezse son bilinen pozisyon kullanılır.
+        """
+        current_pan, current_tilt = current if current is not None else self.get_servo_position()
+        zoom = self.zoom_level if zoom is None else zoom
+
+        target_pan, target_tilt = self.kinematics.pixel_to_angles(
+            x, y, current_pan, current_tilt, zoom, self.frame_width, self.frame_height)
+
+        gain = self.face_track_gain if is_face_tracking else 1.0
+        new_pan = current_pan + (target_pan - current_pan) * gain
+        new_tilt = current_tilt + (target_tilt - current_tilt) * gain
         
         # Servo sınırlarını uygula
         new_pan = max(self.pan_min, min(self.pan_max, new_pan))
         new_tilt = max(self.tilt_min, min(self.tilt_max, new_tilt))
         
-        return int(new_pan), int(new_tilt)
+        return int(round(new_pan)), int(round(new_tilt))
     
     def mouse_callback(self, event, x, y, flags, param):
         """Fare tıklama olayları"""
+        if event == cv2.EVENT_LBUTTONDOWN and self.mode == 1:
+            # Yüz modunda tıklanan yüze kilitlen
+            if self.face_tracker.lock_at(x, y):
+                print(f"Yüz kilitlendi: #{self.face_tracker.locked_id}")
+            return
         if event == cv2.EVENT_LBUTTONDOWN and self.click_mode:
             print(f"Tıklanan nokta: ({x}, {y})")
+            # Son bilinen pozisyondan tek komut (ayrı durum sorgusu yok)
             pan, tilt = self.calculate_servo_position(x, y, is_face_tracking=False)
             print(f"Servo pozisyonları - Pan: {pan}, Tilt: {tilt}")
             self.send_servo_command(pan, tilt)
@@ -217,26 +356,35 @@ class PanTiltController:
     
     def detect_and_track_faces(self, frame):
         """Yüz tanıma ve takip - Kayıp hedef kurtarma + Otomatik zoom sistemi eklendi"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
+        faces = self.detect_faces(frame)
+        visible = self.face_tracker.update(faces)
+        target = self.face_tracker.select(self.frame_width, self.frame_height)
         
         current_time = time.time()
-        
-        if len(faces) > 0:
-            # Hedef bulundu, zamanı güncelle
-            self.last_face_detection_time = current_time
-            self.lost_target_recovery = False
-            
-            # En büyük yüzü seç (en yakın olduğunu varsayıyoruz)
-            largest_face = max(faces, key=lambda f: f[2] * f[3])
-            x, y, w, h = largest_face
+
+        # Kilitli olmayan yüzler ince gri çerçeve + kimlik
+        for track in visible:
+            if target is None or track.track_id != target.track_id:
+                fx, fy, fw, fh = track.box
+                cv2.rectangle(frame, (fx, fy), (fx + fw, fy + fh), (160, 160, 160), 1)
+                cv2.putText(frame, f"#{track.track_id}", (fx, fy - 5),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.4, (160, 160, 160), 1)
+        
+        if target is not None:
+            # Kilitli yüz (politika: largest / first_seen / center / clicked)
+            x, y, w, h = target.box
             
             # Yüzün merkez noktası
             face_center_x = x + w // 2
             face_center_y = y + h // 2
+
+            # Hedef bulundu, kurtarma sistemine bildir
+            pan_now, tilt_now = self.get_servo_position()
+            self.recovery.observe(face_center_x, face_center_y, pan_now, tilt_now,
+                                  self.zoom_level, self.frame_width, self.frame_height)
             
             # Otomatik zoom ayarı
-            self.auto_adjust_zoom(w)
+            self.auto_adjust_zoom(w, center=(face_center_x, face_center_y))
             
             # Yüzü çerçevele - Renk boyuta göre değişsin
             if w < self.min_face_width:
@@ -250,7 +398,7 @@ class PanTiltController:
             cv2.circle(frame, (face_center_x, face_center_y), 5, (0, 255, 0), -1)
             
             # Boyut bilgisini göster
-            cv2.putText(frame, f"Boyut: {w}x{h}", (x, y-10), 
+            cv2.putText(frame, f"#{target.track_id} Boyut: {w}x{h}", (x, y-10), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
             
             # Kamera merkezinden uzaklık
@@ -295,26 +443,46 @@ class PanTiltController:
             
         else:
             # Hedef bulunamadı
-            time_since_last_face = current_time - self.last_face_detection_time
-            
-            if time_since_last_face > self.no_face_timeout and not self.lost_target_recovery:
-                # 5 saniyedir hedef görülmüyor, merkeze dön
-                print(f"{self.no_face_timeout} saniyedir hedef bulunamadı! Merkeze dönülüyor...")
-                self.center_camera()
-                self.zoom_level = 1.0  # Zoom'u sıfırla
-                self.update_dead_zone()  # Dead zone'u güncelle
-                self.lost_target_recovery = True
-                
-            # Geri sayımı göster
-            if time_since_last_face < self.no_face_timeout:
-                remaining_time = self.no_face_timeout - time_since_last_face
-                cv2.putText(frame, f"Hedef aranıyor... {remaining_time:.1f}s", 
-                           (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-            else:
-                cv2.putText(frame, "HEDEF KAYBOLDU - MERKEZE DÖNÜYOR", 
-                           (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+            self.handle_lost_target(frame)
         
         return frame
+
+    def detect_faces(self, frame):
+        """Yüzleri (x, y, w, h) listesi olarak döndür; kurtarma sırasında düşük çözünürlükte"""
+        if not self.governor.should_detect():
+            return self.last_faces
+        if not self.motion_gate.should_detect(frame, self.zoom_level, "yuz"):
+            return self.last_faces
+        self.last_faces = self._run_face_detector(frame)
+        return self.last_faces
+
+    def _run_face_detector(self, frame):
+        scale = self.scan_scale if self.recovery.scan_mode else 1.0
+        settings = self.governor.settings
+        scale = min(scale, settings["face_scale"])
+        detector = self.face_detector
+        if settings["light_backend"] and detector.name != "haar":
+            if self.light_face_detector is None:
+                self.light_face_detector = create_face_detector("haar", pool=self.buffers)
+            detector = self.light_face_detector
+        return detector.detect(frame, scale)
+
+    def handle_lost_target(self, frame):
+        """Hedef görülmediğinde kurtarma adımını uygula ve durumu göster"""
+        self.zoom_controller.reset()
+        action, pan, tilt = self.recovery.update()
+        if action == "move":
+            self.send_servo_command(pan, tilt)
+            self.last_face_move_time = time.time()
+        elif action == "center":
+            self.center_camera()
+            self.zoom_level = 1.0  # Zoom'u sıfırla
+            self.update_dead_zone()  # Dead zone'u güncelle
+
+        text = self.recovery.status_text()
+        if text:
+            color = (0, 255, 255) if not self.recovery.scan_mode else (0, 0, 255)
+            cv2.putText(frame, text, (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
     
     def draw_interface(self, frame):
         """Arayüz çiz - Gelişmiş bilgiler eklendi"""
@@ -356,7 +524,7 @@ class PanTiltController:
                    cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 255), 1)
         
         # Kontroller
-        controls_start_y = frame.shape[0] - 170
+        controls_start_y = frame.shape[0] - 185
         cv2.putText(frame, "Kontroller:", (10, controls_start_y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
         cv2.putText(frame, "SPACE: Mod Degistir", (10, controls_start_y + 15), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
         cv2.putText(frame, "C: Merkez", (10, controls_start_y + 30), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
@@ -371,6 +539,10 @@ class PanTiltController:
                    (10, controls_start_y + 135), cv2.FONT_HERSHEY_SIMPLEX, 0.3, (0, 255, 0), 1)
         cv2.putText(frame, f"Akıllı Zoom: Hedef boyutuna göre otomatik ayar", 
                    (10, controls_start_y + 150), cv2.FONT_HERSHEY_SIMPLEX, 0.3, (0, 255, 255), 1)
+        cv2.putText(frame, f"T: Karolu uzak duba taramasi ({'ACIK' if self.tiled_enabled else 'KAPALI'})",
+                   (10, controls_start_y + 165), cv2.FONT_HERSHEY_SIMPLEX, 0.3, (0, 165, 255), 1)
+        cv2.putText(frame, f"P: Yuz kilit politikasi ({self.face_tracker.policy})",
+                   (10, controls_start_y + 180), cv2.FONT_HERSHEY_SIMPLEX, 0.3, (255, 0, 0), 1)
         
         return frame
     
@@ -400,6 +572,42 @@ class PanTiltController:
         status = "AÇIK" if self.auto_zoom_enabled else "KAPALI"
         print(f"Otomatik zoom: {status}")
     
+    def toggle_tiled_detection(self):
+        """Karolu uzak duba taramasını aç/kapat"""
+        self.tiled_enabled = not self.tiled_enabled
+        self.tiled_detector.invalidate()
+        status = "AÇIK" if self.tiled_enabled else "KAPALI"
+        print(f"Karolu duba taraması: {status}")
+        if self.tiled_enabled and self.inference_pool is not None:
+            print("Çıkarım havuzu açıkken karolu tarama çalışmaz")
+
+    def calibrate_kinematics(self):
+        """Servoyu küçük adımlarla oynatıp görüş açılarını ölç ve kaydet (zoom 1x)"""
+        print("Kinematik kalibrasyonu: sahne durağan ve dokulu olmalı...")
+        self.zoom_level = 1.0
+        self.update_dead_zone()
+        pan, tilt = self.get_servo_position()
+
+        def read_frame():
+            # Havuzdaki tampon iki okuma sonra ezilir; referans kare kopyalanmalı
+            ret, frame = self.camera.read()
+            return frame.copy() if ret else None
+
+        fov = calibrate(read_frame, self.send_servo_command, pan, tilt,
+                        self.frame_width, self.frame_height)
+        if fov is None:
+            print("Kalibrasyon başarısız, mevcut değerler korunuyor")
+            return
+        self.kinematics.hfov_deg, self.kinematics.vfov_deg = fov
+        self.kinematics.save()
+        print("Kalibrasyon kaydedildi")
+
+    def toggle_segmentation(self):
+        """Maske tabanlı duba menzilini aç/kapat"""
+        self.segmentation_enabled = not self.segmentation_enabled
+        status = "AÇIK" if self.segmentation_enabled else "KAPALI"
+        print(f"Maske ile duba menzili: {status}")
+
     def center_camera(self):
         """Kamerayı merkeze getir"""
         print("Kamera merkeze getiriliyor...")
@@ -407,12 +615,14 @@ class PanTiltController:
         self.target_x = None
         self.target_y = None
         # Kayıp hedef recovery'yi sıfırla
-        self.last_face_detection_time = time.time()
-        self.lost_target_recovery = False
+        self.recovery.reset()
+        self.face_tracker.release()
     
     def run(self):
         if not self.initialize_camera():
             return
+
+        self.start_inference_pool()
         
         cv2.namedWindow('Pan-Tilt Kamera Kontrolu')
         cv2.setMouseCallback('Pan-Tilt Kamera Kontrolu', self.mouse_callback)
@@ -427,16 +637,23 @@ class PanTiltController:
         print("- + / -: Zoom kontrolü")
         print("- R: Zoom reset")
         print("- A: Auto-zoom aç/kapat")
+        print("- T: Karolu uzak duba taraması aç/kapat")
+        print("- P: Yüz kilit politikası (en büyük / ilk görülen / merkez / tıklanan)")
+        print("- Yüz modunda bir yüze tıklayın: O kişiye kilitlenir")
+        print("- K: Görüş açısı kalibrasyonu (tıklama tek komutta hedefe gitsin)")
+        print("- M: Duba menzilini maske temas noktasından hesapla (aç/kapat)")
         print("- Q: Çıkış")
-        print("Kayıp hedef koruması: 5 saniye hedef görülmezse merkeze döner")
+        print("Kayıp hedef koruması: hedefin gittiği yöne bakar, sonra tarar, bulamazsa merkeze döner")
         
         self.running = True
         
         while self.running:
+            self.buffers.begin_frame()
             ret, frame = self.camera.read()
             if not ret:
                 print("Kamera görüntüsü alınamıyor!")
                 break
+            frame_start = time.perf_counter()
             
             # Zoom uygula
             frame = self.apply_zoom(frame)
@@ -448,13 +665,19 @@ class PanTiltController:
                 if frame is not None:
                     frame = self.detect_and_track_cone(frame)
 
-            # Arayüzü çiz
-            frame = self.draw_interface(frame)
+            # Arayüzü çiz (yük altında kapatılır, sadece seviye yazılır)
+            if self.governor.settings["overlay"]:
+                frame = self.draw_interface(frame)
+            else:
+                cv2.putText(frame, self.governor.status_text(), (10, 30),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
             
             cv2.imshow('Pan-Tilt Kamera Kontrolu', frame)
             
             # Klavye kontrolleri
             key = cv2.waitKey(1) & 0xFF
+            # Kamera beklemesi hariç kare işlem süresi
+            self.governor.record(time.perf_counter() - frame_start)
             if key == ord('q'):
                 self.running = False
 
@@ -463,6 +686,9 @@ class PanTiltController:
                 self.mode = (self.mode + 1) % 3  # 0->1->2->0
                 modes = ["Tıklama Modu", "Yüz Takip Modu", "Duba Takip Modu"]
                 print(f"Mod değiştirildi: {modes[self.mode]}")
+                self.recovery.reset()
+                self.motion_gate.reset()
+                self.face_tracker.reset()
             elif key == ord('c'):
                 self.center_camera()
             elif key == ord('+') or key == ord('='):
@@ -473,66 +699,190 @@ class PanTiltController:
                 self.reset_zoom()
             elif key == ord('a'):
                 self.toggle_auto_zoom()
+            elif key == ord('t'):
+                self.toggle_tiled_detection()
+            elif key == ord('p'):
+                print(f"Yüz kilit politikası: {self.face_tracker.cycle_policy()}")
+            elif key == ord('k'):
+                self.calibrate_kinematics()
+            elif key == ord('m'):
+                self.toggle_segmentation()
         
         self.cleanup()
 
     
+    def start_inference_pool(self):
+        """YOLO işçi süreçlerini başlat"""
+        if self.inference_workers <= 0 or self.inference_pool is not None:
+            return
+        self.inference_pool = InferencePool(
+            "duba.pt", workers=self.inference_workers, slots=self.inference_workers + 2,
+            max_shape=(self.frame_height, self.frame_width, 3), conf=0.5)
+        self.inference_pool.start()
+
+    def choose_cone_imgsz(self, frame):
+        """Bu kare için YOLO giriş boyutu"""
+        if self.recovery.scan_mode:
+            imgsz = self.scan_imgsz  # Kurtarma sırasında hızlı tarama
+        else:
+            imgsz = self.imgsz_policy.choose(self.smallest_cone_height(), frame.shape)
+            if self.tiled_enabled:
+                # Uzak dubaları karolar yakalıyor, tam kare geçişi yüksek çözünürlüğe çıkmasın
+                imgsz = min(imgsz, self.imgsz_policy.default_imgsz)
+        imgsz_cap = self.governor.settings["imgsz_cap"]
+        if imgsz_cap is not None:
+            imgsz = min(imgsz, imgsz_cap)
+        return imgsz
+
+    def detect_cones_raw(self, frame, imgsz=None):
+        """Duba tespitlerini (N x 6 dizi, sınıf isimleri) olarak döndür"""
+        if imgsz is None:
+            imgsz = self.choose_cone_imgsz(frame)
+
+        start = time.perf_counter()
+        results = self.model(frame, conf=0.5, verbose=False, imgsz=imgsz) #yuksek conf daha az tahmin
+        self.imgsz_policy.record(imgsz, time.perf_counter() - start)
+        r = results[0]
+
+        names = getattr(r, "names", None)
+        if names is None:
+            names = getattr(self.model, "names", {})
+
+        return boxes_to_array(r.boxes), names
+
+    def smallest_cone_height(self):
+        """Son karedeki en küçük duba yüksekliği (piksel), duba yoksa None"""
+        if self.last_cones is None or len(self.last_cones) == 0:
+            return None
+        return int(self.last_cones.obj_h.min())
+
+    def detect_cones_pooled(self, frame):
+        """Çıkarım havuzuyla dubalar: kapılar sadece gönderimi belirler
+
+        Sonuçlar her karede toplanır; havuzdan yeni kare kimliği geldiğinde
+        last_cones yenilenir. Yuva yoksa kare düşer ve hareket kapısının
+        referansı güncellenmez (sonraki kare yine gönderilmeye çalışılır).
+        """
+        pool = self.inference_pool
+        if (self.governor.should_detect() and
+                self.motion_gate.should_detect(frame, self.zoom_level, "duba", update=False)):
+            if pool.submit(frame, imgsz=self.choose_cone_imgsz(frame)) is not None:
+                self.motion_gate.accept("duba", self.zoom_level)
+
+        frame_id, detections = pool.latest()
+        if frame_id == self.last_pool_frame_id and self.last_cones is not None:
+            return self.last_cones
+        if frame_id != self.last_pool_frame_id and pool.last_imgsz:
+            self.imgsz_policy.record(pool.last_imgsz, pool.last_inference_time)
+        self.last_pool_frame_id = frame_id
+        self.last_cones = self.cone_processor.process(detections, frame.shape[1], self.zoom_level,
+                                                      pool.names)
+        return self.last_cones
+
+    def detect_cones(self, frame):
+        """Karedeki dubalar (ConeDetections); sınıf filtresi ve ölçümler vektörel"""
+        if self.inference_pool is not None:
+            return self.detect_cones_pooled(frame)
+        if self.last_cones is not None and not self.governor.should_detect():
+            return self.last_cones
+        detect_now = self.motion_gate.should_detect(frame, self.zoom_level, "duba")
+        if not detect_now and self.last_cones is not None:
+            return self.last_cones
+
+        detections, names = self.detect_cones_raw(frame)
+        light = self.governor.settings["light_backend"]
+        if self.tiled_enabled and not light:
+            camera_moved = time.time() - self.motion_gate.last_camera_move < self.motion_gate.servo_settle
+            tiled = self.tiled_detector.update(frame, self.zoom_level, camera_moved)
+            detections = self.tiled_detector.merge(detections, tiled)
+        self.last_cones = self.cone_processor.process(detections, frame.shape[1], self.zoom_level, names)
+        return self.last_cones
+
+    def update_cone_map(self, cones):
+        """Yeni tespitleri haritaya işle (hareket kapısının tekrar verdiği sonuçları değil)"""
+        if self.inference_pool is not None:
+            # Havuzda bir çıkarım sonucu birden çok karede döner; kare kimliğiyle bir kez işlenir
+            if self.last_pool_frame_id == self.mapped_pool_frame_id:
+                return
+            self.mapped_pool_frame_id = self.last_pool_frame_id
+        elif cones is self.mapped_cones:
+            return
+        self.mapped_cones = cones
+        self.cone_map.prune()
+        if len(cones):
+            pan_now, _ = self.get_servo_position()
+            self.cone_map.add_observations(cones.distance_m, cones.angle_deg, pan_now)
+
     def detect_and_track_cone(self, frame):
         if frame is None:
             return frame
 
-        results = self.model(frame, conf=0.5, verbose=False) #yuksek conf daha az tahmin
-        r = results[0]
+        cones = self.detect_cones(frame)
+        if self.segmentation_enabled and not self.governor.settings["light_backend"]:
+            # Takip edilen dubaların ROI'lerinde, seyrek; menzil haritaya girmeden önce düzeltilir
+            self.cone_footprint.refine(frame, cones, self.current_tilt, self.zoom_level)
+        self.update_cone_map(cones)
+        best = cones.best
 
-        # Sonuç/box yoksa olduğu gibi dön
-        if r is None or r.boxes is None or len(r.boxes) == 0:
+        # Kuş bakışı harita (sağ alt)
+        h, w = frame.shape[:2]
+        self.cone_map.draw(frame, origin=(w - 100, h - 100))
+        cv2.putText(frame, f"Harita: {len(self.cone_map)} duba", (w - 190, h - 20),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 165, 255), 1)
+
+        # Duba yoksa kurtarma adımını uygula
+        if best is None:
+            self.handle_lost_target(frame)
             return frame
 
-        names = getattr(r, "names", None)
-        if names is None:
-            names = getattr(self.model, "names", {})
+        x1, y1, x2, y2 = cones.boxes[best]
+        cx, cy = int(cones.cx[best]), int(cones.cy[best])
+        obj_h = int(cones.obj_h[best])
+        distance_m = cones.distance_m[best]
+        angle_deg = cones.angle_deg[best]
+
+        # Hedef bulundu, kurtarma sistemine bildir
+        pan_now, tilt_now = self.get_servo_position()
+        self.recovery.observe(cx, cy, pan_now, tilt_now,
+                              self.zoom_level, self.frame_width, self.frame_height)
 
-        best = None
-        for box, conf, cls_id in zip(
-            r.boxes.xyxy.cpu().numpy(),
-            r.boxes.conf.cpu().numpy(),
-            r.boxes.cls.cpu().numpy()
-        ):
-            cls_id = int(cls_id)
-            label = str(names.get(cls_id, cls_id)).lower().replace("-", "").replace(" ", "")
-            if label in ("trafficcone", "trafficcone", "cone", "duba"):
-                if best is None or conf > best[1]:
-                    best = (box, conf)
-
-        if best is not None:
-            x1, y1, x2, y2 = best[0].astype(int)
-            cx = (x1 + x2) // 2
-            cy = (y1 + y2) // 2
-            obj_h = max(1, y2 - y1)  # sıfıra bölme koruması
-
-            # Basit uzaklık & açı göstergesi
-            h, w = frame.shape[:2]
-            distance_m = 1000 / obj_h
-            offset_x = cx - (w / 2)
-            angle_deg = (offset_x / (w / 2)) * 30
-
-            # Çizimler
-            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 165, 255), 2)
-            cv2.circle(frame, (cx, cy), 5, (0, 255, 0), -1)
-            cv2.putText(frame, "Duba", (x1, max(0, y1 - 25)),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 165, 255), 2)
-            cv2.putText(frame, f"Yon = {angle_deg:.1f} deg", (x1, max(0, y1 - 10)),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
-            cv2.putText(frame, f"Uzaklik = {distance_m:.2f} m", (x1, min(h-10, y2 + 20)),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
+        # Duba yüksekliğine göre otomatik zoom
+        self.auto_adjust_zoom(obj_h, self.target_cone_height, center=(cx, cy))
 
+        # Çizimler
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 165, 255), 2)
+        cv2.circle(frame, (cx, cy), 5, (0, 255, 0), -1)
+        cv2.putText(frame, "Duba", (x1, max(0, y1 - 25)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 165, 255), 2)
+        cv2.putText(frame, f"Yon = {angle_deg:.1f} deg", (x1, max(0, y1 - 10)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
+        method = getattr(cones, "range_method", None)
+        source = ""
+        if method is not None and method[best] == RANGE_CONTACT:
+            source = " (temas)"
+            px, py = cones.contact[best]
+            cv2.circle(frame, (int(px), int(py)), 4, (0, 0, 255), -1)
+        elif method is not None and method[best] == RANGE_AREA:
+            source = " (alan)"
+        cv2.putText(frame, f"Uzaklik = {distance_m:.2f} m{source}", (x1, min(h-10, y2 + 20)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
 
         return frame
+
     def cleanup(self):
         """Temizleme işlemleri"""
         print("Temizlik yapılıyor...")
+        print(f"Hareket kapısı: tespitlerin %{self.motion_gate.skip_ratio() * 100:.0f}'i atlandı")
+        print(self.buffers.report())
+        if self.governor.transitions:
+            print(f"Gecikme yöneticisi: {len(self.governor.transitions)} seviye geçişi, "
+                  f"son seviye {self.governor.level_name}")
+        if self.inference_pool is not None:
+            self.inference_pool.close()
+            self.inference_pool = None
         if self.camera:
             self.camera.release()
+        self.session.close()
         cv2.destroyAllWindows()
 
 if __name__ == "__main__":
@@ -541,7 +891,25 @@ if __name__ == "__main__":
     # ESP32'nizin IP adresini buraya yazın
     esp32_ip = "192.168.43.185"  # Arduino kodunuzdan aldığınız IP adresini yazın
     
-    controller = PanTiltController(esp32_ip)
+    # 0: YOLO ana süreçte çalışır, >0: ayrı işçi süreç sayısı
+    inference_workers = 0
+
+    # "haar", "yunet" ya da "auto" (yuz_benchmark.py --save ile seçilen)
+    face_backend = "haar"
+
+    # Kare başına işlem bütçesi (ms); aşılırsa kalite kademeli düşer, None = kapalı
+    latency_budget_ms = 60.0
+
+    # "auto", "v4l2" ya da "gstreamer" (kamera_kaynak.py)
+    camera_backend = "auto"
+
+    # True: kare başına gerçek bellek ayırması tracemalloc ile ölçülür (yavaşlatır)
+    trace_allocations = False
+
+    controller = PanTiltController(esp32_ip, inference_workers=inference_workers,
+                                   face_backend=face_backend, camera_backend=camera_backend,
+                                   latency_budget_ms=latency_budget_ms,
+                                   trace_allocations=trace_allocations)
     
     try:
         controller.run()
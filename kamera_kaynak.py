@@ -0,0 +1,177 @@
+"""
+Yapılandırılabilir kamera yakalama katmanı.
+
+cv2.VideoCapture(index) varsayılan arka uçla açıldığında Linux'ta genellikle
+YUYV (düşük FPS) ve derin bir tampon gelir; kare kameradan birkaç kare geç
+okunur. CameraSource:
+
+    auto      : Linux'ta v4l2, diğer sistemlerde OpenCV'nin varsayılanı
+    v4l2      : CAP_V4L2 + MJPG fourcc + CAP_PROP_BUFFERSIZE + FPS
+    gstreamer : appsink drop=true max-buffers=1 boru hattı; MJPEG çözümü
+                donanımda yapılabilir (decoder="nvjpeg" / "v4l2" / "vaapi")
+
+Açılışta anlaşılan fourcc / çözünürlük / FPS yazdırılır, okuma sırasında
+gerçek kare aralığı ölçülür. read / set / get / isOpened / release
+cv2.VideoCapture ile aynı olduğundan kullanan kod değişmeden çalışır.
+pool (tampon_havuzu.BufferPool) verilirse kareler havuzdaki tamponlara okunur.
+"""
+import sys
+import time
+
+import cv2
+
+from olcum import LatencyStats
+
+
+# MJPEG çözücüler; donanım çözücüsü olmayan sistemde "yazilim" kullanın
+GST_DECODERS = {
+    "yazilim": "jpegdec ! videoconvert",
+    "nvjpeg": "nvv4l2decoder mjpeg=1 ! nvvidconv ! video/x-raw,format=BGRx ! videoconvert",  # Jetson
+    "v4l2": "v4l2jpegdec ! videoconvert",  # Raspberry Pi vb.
+    "vaapi": "vaapijpegdec ! videoconvert",  # Intel
+}
+
+
+def fourcc_to_str(value):
+    value = int(value)
+    return "".join(chr((value >> (8 * i)) & 0xFF) for i in range(4)).strip("\x00") or "?"
+
+
+def build_gstreamer_pipeline(device=0, width=1280, height=720, fps=30, decoder="yazilim"):
+    """V4L2 MJPEG kaynağı -> çözücü -> BGR appsink (sadece en son kare tutulur)"""
+    if isinstance(device, int):
+        device = f"/dev/video{device}"
+    return (f"v4l2src device={device} io-mode=2 ! "
+            f"image/jpeg,width={width},height={height},framerate={fps}/1 ! "
+            f"{GST_DECODERS[decoder]} ! video/x-raw,format=BGR ! "
+            f"appsink drop=true max-buffers=1 sync=false")
+
+
+def gstreamer_available():
+    for line in cv2.getBuildInformation().splitlines():
+        if "GStreamer" in line:
+            return "YES" in line
+    return False
+
+
+class CameraSource:
+    def __init__(self, source=0, backend="auto", width=1280, height=720, fps=30, fourcc="MJPG",
+                 buffer_size=1, decoder="yazilim", pipeline=None, report_after=120, pool=None):
+        self.source = source
+        self.backend = backend
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = fourcc
+        self.buffer_size = buffer_size
+        self.decoder = decoder
+        self.pipeline = pipeline  # Hazır GStreamer boru hattı verilirse olduğu gibi kullanılır
+        self.report_after = report_after  # Bu kadar kareden sonra ölçülen aralık bir kez yazdırılır
+        self.pool = pool
+        self.frame_shape = None
+
+        self.cap = None
+        self.active_backend = None
+        self.interval = LatencyStats()
+        self.last_frame_time = None
+        self.frames = 0
+
+    # ---------------------------------------------------------------- açma
+    def open(self):
+        backend = self.backend
+        if backend == "auto":
+            if self.pipeline:
+                backend = "gstreamer"
+            else:
+                backend = "v4l2" if sys.platform.startswith("linux") else "varsayilan"
+
+        if backend == "gstreamer" and not gstreamer_available():
+            print("OpenCV GStreamer desteği olmadan derlenmiş, v4l2 kullanılacak")
+            backend = "v4l2"
+
+        if backend == "gstreamer":
+            pipeline = self.pipeline or build_gstreamer_pipeline(
+                self.source, self.width, self.height, self.fps, self.decoder)
+            self.cap = cv2.VideoCapture(pipeline, cv2.CAP_GSTREAMER)
+        elif backend == "v4l2":
+            self.cap = cv2.VideoCapture(self.source, cv2.CAP_V4L2)
+            if not self.cap.isOpened():
+                print("V4L2 ile açılamadı, varsayılan arka uç deneniyor")
+                backend = "varsayilan"
+        if backend == "varsayilan":
+            self.cap = cv2.VideoCapture(self.source)
+
+        if not self.cap.isOpened():
+            return False
+        self.active_backend = backend
+
+        if backend != "gstreamer":
+            # Sıra önemli: bazı sürücüler fourcc'yi boyuttan önce ister
+            if self.fourcc:
+                self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+            if self.fps:
+                self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+            if self.buffer_size:
+                self.cap.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+
+        fmt = self.negotiated()
+        print(f"Kamera ({backend}): {fmt['fourcc']} {fmt['width']}x{fmt['height']} "
+              f"@ {fmt['fps']:.0f} FPS, tampon: {fmt['buffer']}")
+        if self.fourcc and backend != "gstreamer" and fmt["fourcc"] != self.fourcc:
+            print(f"Uyarı: {self.fourcc} istendi, kamera {fmt['fourcc']} verdi")
+        return True
+
+    def negotiated(self):
+        """Sürücünün gerçekte kabul ettiği ayarlar"""
+        return {
+            "fourcc": fourcc_to_str(self.cap.get(cv2.CAP_PROP_FOURCC)),
+            "width": int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "fps": self.cap.get(cv2.CAP_PROP_FPS),
+            "buffer": int(self.cap.get(cv2.CAP_PROP_BUFFERSIZE)),
+        }
+
+    # ---------------------------------------------------------------- okuma
+    def read(self):
+        if self.pool is not None and self.frame_shape is not None:
+            ret, frame = self.cap.read(self.pool.get("kamera", self.frame_shape))
+        else:
+            ret, frame = self.cap.read()
+        if not ret:
+            return ret, frame
+        self.frame_shape = frame.shape
+
+        now = time.perf_counter()
+        if self.last_frame_time is not None:
+            self.interval.add(now - self.last_frame_time)
+        self.last_frame_time = now
+        self.frames += 1
+        if self.frames == self.report_after:
+            self.report()
+        return ret, frame
+
+    def measured_fps(self):
+        s = self.interval.summary()
+        return 1.0 / s["median"] if s and s["median"] > 0 else 0.0
+
+    def report(self):
+        print(f"{self.interval.format('kare aralığı')} (~{self.measured_fps():.1f} FPS)")
+
+    # ---------------------------------------------------------------- cv2.VideoCapture uyumu
+    def isOpened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def release(self):
+        if self.cap is not None:
+            if self.frames > 1:
+                self.report()
+            self.cap.release()
+            self.cap = None
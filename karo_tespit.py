@@ -0,0 +1,135 @@
+"""
+Uzak (küçük) dubalar için karolu tespit.
+
+1280x720 karede uzaktaki duba birkaç piksel boyundadır ve tek tam kare geçişi
+(model imgsz'e küçülterek) onu kaçırır. apply_zoom ise görüş alanının geri
+kalanını atar. Burada kare örtüşen karolara bölünür, karolar tek bir batch
+olarak duba.pt'den geçirilir ve sonuçlar kare koordinatlarına taşınıp vektörel
+NMS ile birleştirilir.
+
+Karolu geçiş pahalıdır; ana tam kare geçişinden daha seyrek (interval karede
+bir) çalışır, aradaki karelerde son karolu sonuçlar tam kare sonuçlarıyla
+birleştirilir. Kamera hareket edince ya da zoom değişince önbellek geçersiz olur.
+"""
+import numpy as np
+
+from cikarim import boxes_to_array
+
+
+def box_iou(a, b):
+    """(N, 4) ve (M, 4) kutular arasında (N, M) IoU matrisi"""
+    area_a = (a[:, 2] - a[:, 0]).clip(0) * (a[:, 3] - a[:, 1]).clip(0)
+    area_b = (b[:, 2] - b[:, 0]).clip(0) * (b[:, 3] - b[:, 1]).clip(0)
+
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = (x2 - x1).clip(0) * (y2 - y1).clip(0)
+
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-6)
+
+
+def nms(detections, iou_threshold=0.5):
+    """Sınıf bazlı NMS; N x 6 (x1, y1, x2, y2, conf, cls) -> tutulan satırlar
+
+    IoU matrisi tek seferde hesaplanır; döngü sadece tutulan kutular kadar döner.
+    """
+    if len(detections) <= 1:
+        return detections
+
+    order = np.argsort(-detections[:, 4])
+    dets = detections[order]
+    iou = box_iou(dets[:, :4], dets[:, :4])
+    # Farklı sınıflar birbirini bastırmasın
+    iou[dets[:, None, 5] != dets[None, :, 5]] = 0.0
+
+    suppressed = np.zeros(len(dets), dtype=bool)
+    keep = []
+    for i in range(len(dets)):
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        suppressed |= iou[i] > iou_threshold
+
+    return dets[keep]
+
+
+def tile_origins(length, tile, overlap):
+    """Bir eksen boyunca karo başlangıçları; son karo kenara hizalanır"""
+    if length <= tile:
+        return [0]
+    step = max(1, int(tile * (1.0 - overlap)))
+    origins = list(range(0, length - tile, step))
+    origins.append(length - tile)
+    return origins
+
+
+class TiledDetector:
+    def __init__(self, model, tile_size=640, overlap=0.2, conf=0.4, iou=0.5,
+                 interval=5, max_age=15):
+        self.model = model
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.conf = conf
+        self.iou = iou
+        self.interval = interval    # Karolu geçiş her N karede bir
+        self.max_age = max_age      # Bu kadar kareden eski karolu sonuç kullanılmaz
+
+        self.frame_count = 0
+        self.cached = np.zeros((0, 6), dtype=np.float32)
+        self.cached_frame = None
+        self.cached_zoom = None
+
+    def invalidate(self):
+        """Kamera hareket etti / zoom değişti: karolu sonuçlar artık geçersiz"""
+        self.cached = self.cached[:0]
+        self.cached_frame = None
+
+    def detect(self, frame):
+        """Tüm karoları tek batch'te çalıştır, kare koordinatlarında N x 6 döndür"""
+        h, w = frame.shape[:2]
+        t = min(self.tile_size, w, h)
+        origins = [(x0, y0) for y0 in tile_origins(h, t, self.overlap)
+                   for x0 in tile_origins(w, t, self.overlap)]
+
+        # Karolar kopya değil görünüm
+        tiles = [frame[y0:y0 + t, x0:x0 + t] for x0, y0 in origins]
+        results = self.model.predict(tiles, imgsz=self.tile_size, conf=self.conf, verbose=False)
+
+        parts = []
+        for (x0, y0), r in zip(origins, results):
+            dets = boxes_to_array(r.boxes)
+            if len(dets):
+                dets[:, [0, 2]] += x0
+                dets[:, [1, 3]] += y0
+                parts.append(dets)
+
+        if not parts:
+            return np.zeros((0, 6), dtype=np.float32)
+        return nms(np.concatenate(parts), self.iou)
+
+    def update(self, frame, zoom=1.0, camera_moved=False):
+        """Zamanı geldiyse karolu geçişi çalıştır; geçerli karolu sonuçları döndür"""
+        self.frame_count += 1
+        if camera_moved or (self.cached_zoom is not None and zoom != self.cached_zoom):
+            self.invalidate()
+
+        # Kamera hareket halindeyken pahalı geçiş yapılmaz, bir sonraki sıra beklenir
+        due = self.cached_zoom is None or self.frame_count % self.interval == 0
+        if due and not camera_moved:
+            self.cached = self.detect(frame)
+            self.cached_frame = self.frame_count
+            self.cached_zoom = zoom
+
+        if self.cached_frame is None or self.frame_count - self.cached_frame > self.max_age:
+            return self.cached[:0]
+        return self.cached
+
+    def merge(self, full_frame, tiled):
+        """Tam kare ve karolu tespitleri birleştir (karolar arası tekrarlar da elenir)"""
+        if len(tiled) == 0:
+            return full_frame
+        if len(full_frame) == 0:
+            return tiled
+        return nms(np.concatenate([full_frame, tiled]), self.iou)
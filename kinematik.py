@@ -0,0 +1,171 @@
+"""
+Pan-tilt kafa kinematiği: piksel -> servo açısı.
+
+Sabit piksel başına hassasiyet katsayıları yerine iğne deliği kamera modeli
+kullanılır. Odak uzaklığı yatay/dikey görüş açısından hesaplanır
+(fx = (w/2) / tan(hfov/2)) ve yazılımsal zoom ile çarpılır. Tıklanan pikselin
+ışını kameranın o anki yönelimiyle dünyaya döndürülür ve optik ekseni o ışına
+hizalayan pan/tilt tek seferde bulunur. Böylece tıklanan nokta tek komutla
+merkeze gelir; tilt büyükken pan'ın yatay etkisinin azalması da hesaba katılır.
+
+Eksenler calculate_servo_position ile aynıdır: pan artınca kamera sola, tilt
+artınca aşağı bakar. tilt_level kameranın yatay baktığı tilt değeridir.
+pan_offset_deg / tilt_offset_deg montaj kaçıklığıdır (servo sıfırı ile optik
+eksen arasındaki açı), cx / cy ana noktanın merkezden kayması (piksel).
+
+calibrate ile servo küçük adımlarla oynatılır, kareler arası kayma
+cv2.phaseCorrelate ile ölçülür ve odak uzaklıkları en küçük karelerle
+uydurulur. Sonuç KINEMATICS_FILE dosyasına yazılır ve açılışta okunur.
+"""
+import json
+import math
+import time
+
+import cv2
+import numpy as np
+
+
+KINEMATICS_FILE = "kinematik.json"
+PAN_CENTER = 90
+
+
+class PanTiltKinematics:
+    def __init__(self, hfov_deg=60.0, vfov_deg=34.0, tilt_level=150.0,
+                 pan_offset_deg=0.0, tilt_offset_deg=0.0, cx=0.0, cy=0.0):
+        # duba açısı hesabındaki ±30 derece ile aynı varsayılan yatay görüş açısı
+        self.hfov_deg = hfov_deg
+        self.vfov_deg = vfov_deg
+        self.tilt_level = tilt_level
+        self.pan_offset_deg = pan_offset_deg
+        self.tilt_offset_deg = tilt_offset_deg
+        self.cx = cx
+        self.cy = cy
+
+    # ---------------------------------------------------------------- model
+    def focal_px(self, frame_w, frame_h, zoom=1.0):
+        fx = (frame_w / 2) / math.tan(math.radians(self.hfov_deg) / 2)
+        fy = (frame_h / 2) / math.tan(math.radians(self.vfov_deg) / 2)
+        return fx * zoom, fy * zoom
+
+    def _orientation(self, pan, tilt):
+        """Servo açıları -> (sola sapma, yukarı yunuslama) radyan"""
+        yaw = math.radians(pan - PAN_CENTER + self.pan_offset_deg)
+        pitch = math.radians(self.tilt_level - tilt + self.tilt_offset_deg)
+        return yaw, pitch
+
+    def _servo(self, yaw, pitch):
+        pan = PAN_CENTER + math.degrees(yaw) - self.pan_offset_deg
+        tilt = self.tilt_level - math.degrees(pitch) + self.tilt_offset_deg
+        return pan, tilt
+
+    def pixel_to_angles(self, x, y, pan, tilt, zoom, frame_w, frame_h):
+        """Pikseldeki noktayı optik eksen merkezine getiren mutlak (pan, tilt)"""
+        fx, fy = self.focal_px(frame_w, frame_h, zoom)
+        # Kamera çerçevesinde ışın: ileri, sol, yukarı
+        fwd = 1.0
+        left = (frame_w / 2 + self.cx - x) / fx
+        up = (frame_h / 2 + self.cy - y) / fy
+
+        yaw, pitch = self._orientation(pan, tilt)
+        # Yunuslama (sol eksen etrafında), sonra sapma (dikey eksen etrafında)
+        cp, sp = math.cos(pitch), math.sin(pitch)
+        fwd, up = fwd * cp - up * sp, fwd * sp + up * cp
+        cyaw, syaw = math.cos(yaw), math.sin(yaw)
+        fwd, left = fwd * cyaw - left * syaw, fwd * syaw + left * cyaw
+
+        return self._servo(math.atan2(left, fwd), math.atan2(up, math.hypot(fwd, left)))
+
+    # ---------------------------------------------------------------- dosya
+    def to_dict(self):
+        return {
+            "hfov_deg": self.hfov_deg, "vfov_deg": self.vfov_deg, "tilt_level": self.tilt_level,
+            "pan_offset_deg": self.pan_offset_deg, "tilt_offset_deg": self.tilt_offset_deg,
+            "cx": self.cx, "cy": self.cy,
+        }
+
+    def save(self, path=KINEMATICS_FILE):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path=KINEMATICS_FILE, **defaults):
+        """Kalibrasyon dosyası varsa oku, yoksa varsayılanlarla oluştur"""
+        try:
+            with open(path) as f:
+                params = json.load(f)
+        except (OSError, ValueError):
+            return cls(**defaults)
+        params = {k: v for k, v in params.items() if k in cls().to_dict()}
+        print(f"Kinematik kalibrasyonu yüklendi: {path}")
+        return cls(**{**defaults, **params})
+
+
+# ---------------------------------------------------------------- kalibrasyon
+def measure_shift(frame_a, frame_b):
+    """İki kare arasındaki (dx, dy) piksel kayması ve güven değeri"""
+    a = np.float32(cv2.cvtColor(frame_a, cv2.COLOR_BGR2GRAY))
+    b = np.float32(cv2.cvtColor(frame_b, cv2.COLOR_BGR2GRAY))
+    window = cv2.createHanningWindow(a.shape[::-1], cv2.CV_32F)
+    (dx, dy), response = cv2.phaseCorrelate(a, b, window)
+    return dx, dy, response
+
+
+def fit_focal(deltas_deg, shifts_px):
+    """shift = f * tan(delta) modeline en küçük kareler ile f (piksel)"""
+    t = np.tan(np.radians(np.asarray(deltas_deg, dtype=np.float64)))
+    s = np.asarray(shifts_px, dtype=np.float64)
+    denom = float((t * t).sum())
+    if denom <= 1e-12:
+        return None
+    f = float((t * s).sum() / denom)
+    residual = float(np.sqrt(np.mean((s - f * t) ** 2)))
+    return f, residual
+
+
+def calibrate(read_frame, move, pan, tilt, frame_w, frame_h, steps=(-6, -3, 3, 6),
+              settle=0.8, min_response=0.1):
+    """Servoyu (pan, tilt) etrafında küçük adımlarla oynatıp görüş açılarını uydur
+
+    read_frame() -> kare, move(pan, tilt) servo komutu. Zoom 1x olmalı ve sahne
+    durağan, dokulu olmalı. (hfov_deg, vfov_deg) ya da ölçüm yetersizse None.
+    """
+    def settled_frame():
+        time.sleep(settle)
+        frame = None
+        for _ in range(4):  # Tampondaki eski kareleri at
+            frame = read_frame()
+        return frame
+
+    results = []
+    for axis in ("pan", "tilt"):
+        deltas, shifts = [], []
+        move(pan, tilt)
+        base = settled_frame()
+        for d in steps:
+            move(pan + d, tilt) if axis == "pan" else move(pan, tilt + d)
+            frame = settled_frame()
+            if base is None or frame is None:
+                continue
+            dx, dy, response = measure_shift(base, frame)
+            if response < min_response:
+                print(f"  {axis} {d:+d}°: zayıf eşleşme ({response:.2f}), atlandı")
+                continue
+            # Pan artınca sahne sağa kayar (kamera sola döner); tilt artınca sahne yukarı kayar
+            shift = dx if axis == "pan" else -dy
+            print(f"  {axis} {d:+d}°: {shift:+.1f} px (güven {response:.2f})")
+            deltas.append(d)
+            shifts.append(shift)
+        move(pan, tilt)
+
+        fit = fit_focal(deltas, shifts) if len(deltas) >= 2 else None
+        if fit is None or fit[0] <= 0:
+            print(f"{axis} ekseni için yeterli ölçüm yok")
+            return None
+        results.append(fit)
+
+    (fx, rx), (fy, ry) = results
+    hfov = math.degrees(2 * math.atan((frame_w / 2) / fx))
+    vfov = math.degrees(2 * math.atan((frame_h / 2) / fy))
+    print(f"Kalibrasyon: fx={fx:.0f}px (hata {rx:.1f}px) -> HFOV {hfov:.1f}°, "
+          f"fy={fy:.0f}px (hata {ry:.1f}px) -> VFOV {vfov:.1f}°")
+    return hfov, vfov
@@ -0,0 +1,116 @@
+// Sürüş motoru denetleyicisi
+//
+// PC'deki motor_kopru.py'den 9 baytlık ikili komut çerçeveleri alır:
+//   0xAA 0x55 | seq | direksiyon (int16 LE) | gaz (int16 LE) | bayraklar | crc8
+// Her geçerli çerçeveye 5 baytlık onay gönderir:
+//   0xAA 0x56 | seq | durum | crc8
+//
+// WATCHDOG_MS boyunca geçerli çerçeve gelmezse motorlar durdurulur
+// (PC / görüntü hattı takılırsa araç kendi başına durur).
+
+#include <Servo.h>
+
+#define WATCHDOG_MS 200
+
+#define FLAG_ENABLE 0x01
+#define FLAG_ESTOP 0x02
+
+#define STATUS_WATCHDOG 0x01
+#define STATUS_ENABLED 0x02
+
+const int DIREKSIYON_PIN = 9;   // Direksiyon servosu
+const int ESC_PIN = 10;         // Hız kontrolcüsü (ESC), servo sinyali ile
+
+Servo direksiyonServo;
+Servo esc;
+
+uint8_t buf[9];
+uint8_t bufLen = 0;
+
+unsigned long sonCerceve = 0;
+bool bekciTetiklendi = true;
+bool surusIzni = false;
+
+uint8_t crc8(const uint8_t* data, uint8_t len) {
+  uint8_t crc = 0;
+  for (uint8_t i = 0; i < len; i++) {
+    crc ^= data[i];
+    for (uint8_t b = 0; b < 8; b++) {
+      crc = (crc & 0x80) ? (crc << 1) ^ 0x07 : (crc << 1);
+    }
+  }
+  return crc;
+}
+
+void motorlariYaz(int direksiyon, int gaz) {
+  // -1000..1000 -> 1000..2000 us servo darbesi
+  direksiyonServo.writeMicroseconds(1500 + direksiyon / 2);
+  esc.writeMicroseconds(1500 + gaz / 2);
+}
+
+void durdur() {
+  motorlariYaz(0, 0);
+  surusIzni = false;
+}
+
+void onayGonder(uint8_t seq) {
+  uint8_t durum = 0;
+  if (bekciTetiklendi) durum |= STATUS_WATCHDOG;
+  if (surusIzni) durum |= STATUS_ENABLED;
+
+  uint8_t cikis[5] = {0xAA, 0x56, seq, durum, 0};
+  cikis[4] = crc8(cikis + 2, 2);
+  Serial.write(cikis, 5);
+}
+
+void cerceveIsle() {
+  uint8_t seq = buf[2];
+  int16_t direksiyon = (int16_t)(buf[3] | (buf[4] << 8));
+  int16_t gaz = (int16_t)(buf[5] | (buf[6] << 8));
+  uint8_t bayraklar = buf[7];
+
+  sonCerceve = millis();
+  bekciTetiklendi = false;
+
+  if ((bayraklar & FLAG_ESTOP) || !(bayraklar & FLAG_ENABLE)) {
+    durdur();
+  } else {
+    surusIzni = true;
+    motorlariYaz(constrain(direksiyon, -1000, 1000), constrain(gaz, -1000, 1000));
+  }
+
+  onayGonder(seq);
+}
+
+void setup() {
+  Serial.begin(115200);
+  direksiyonServo.attach(DIREKSIYON_PIN);
+  esc.attach(ESC_PIN);
+  durdur();
+}
+
+void loop() {
+  while (Serial.available() > 0) {
+    uint8_t b = Serial.read();
+
+    // Senkron baytlarını bekle
+    if (bufLen == 0 && b != 0xAA) continue;
+    if (bufLen == 1 && b != 0x55) {
+      bufLen = (b == 0xAA) ? 1 : 0;
+      continue;
+    }
+
+    buf[bufLen++] = b;
+    if (bufLen == 9) {
+      if (crc8(buf + 2, 6) == buf[8]) {
+        cerceveIsle();
+      }
+      bufLen = 0;
+    }
+  }
+
+  if (!bekciTetiklendi && millis() - sonCerceve > WATCHDOG_MS) {
+    durdur();
+    bekciTetiklendi = true;
+  }
+}
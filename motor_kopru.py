@@ -0,0 +1,274 @@
+"""
+Sürüş motorları için düşük gecikmeli seri köprü.
+
+Görüntü ve ultrasonik hattın direksiyon/gaz kararları mikrodenetleyiciye
+(motor_kontrol/motor_kontrol.ino) sabit yüksek frekansta ikili çerçevelerle
+gönderilir. Her komut çerçevesi aynı zamanda kalp atışıdır: mikrodenetleyici
+WATCHDOG_MS boyunca geçerli çerçeve alamazsa motorları durdurur. Python
+tarafında da set_command command_timeout boyunca çağrılmazsa (görüntü hattı
+takıldıysa) köprü kendiliğinden "dur" göndermeye başlar.
+
+Komut çerçevesi (9 bayt, little endian):
+    0xAA 0x55 | seq u8 | direksiyon i16 | gaz i16 | bayraklar u8 | crc8
+    direksiyon, gaz: -1000..1000 (direksiyon + = sağ, gaz + = ileri)
+    bayraklar: bit0 = sürüş izni, bit1 = acil durdurma
+
+Onay çerçevesi (5 bayt):
+    0xAA 0x56 | seq u8 | durum u8 | crc8
+    durum: bit0 = bekçi tetiklendi (motorlar durdu), bit1 = sürüş izni var
+
+Komut -> onay gecikmesi seq numarası ile ölçülür.
+"""
+import struct
+import threading
+import time
+
+import serial
+
+from olcum import LatencyStats
+
+
+SYNC = 0xAA
+CMD_TYPE = 0x55
+ACK_TYPE = 0x56
+
+CMD_LEN = 9
+ACK_LEN = 5
+
+FLAG_ENABLE = 0x01
+FLAG_ESTOP = 0x02
+
+STATUS_WATCHDOG = 0x01
+STATUS_ENABLED = 0x02
+
+_CMD_STRUCT = struct.Struct("<BBBhhB")
+
+
+def _crc8_table():
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+
+CRC8_TABLE = _crc8_table()
+
+
+def crc8(data):
+    """CRC-8 (polinom 0x07), motor_kontrol.ino ile aynı"""
+    crc = 0
+    for b in data:
+        crc = CRC8_TABLE[crc ^ b]
+    return crc
+
+
+def encode_command(seq, steering, throttle, flags):
+    body = _CMD_STRUCT.pack(SYNC, CMD_TYPE, seq & 0xFF, steering, throttle, flags)
+    return body + bytes([crc8(body[2:])])
+
+
+def encode_ack(seq, status):
+    body = bytes([SYNC, ACK_TYPE, seq & 0xFF, status & 0xFF])
+    return body + bytes([crc8(body[2:])])
+
+
+def decode_command(frame):
+    """9 baytlık komut çerçevesi -> (seq, direksiyon, gaz, bayraklar) ya da None"""
+    if len(frame) != CMD_LEN or frame[0] != SYNC or frame[1] != CMD_TYPE:
+        return None
+    if crc8(frame[2:-1]) != frame[-1]:
+        return None
+    _, _, seq, steering, throttle, flags = _CMD_STRUCT.unpack(frame[:-1])
+    return seq, steering, throttle, flags
+
+
+def parse_frames(buffer, frame_type, frame_len):
+    """Tampondaki geçerli çerçeveleri ayıkla; (çerçeveler, kalan tampon)"""
+    frames = []
+    i = 0
+    n = len(buffer)
+    while i + frame_len <= n:
+        if buffer[i] != SYNC or buffer[i + 1] != frame_type:
+            i += 1
+            continue
+        frame = bytes(buffer[i:i + frame_len])
+        if crc8(frame[2:-1]) == frame[-1]:
+            frames.append(frame)
+            i += frame_len
+        else:
+            i += 1  # Bozuk çerçeve, bir sonraki senkron baytını ara
+    return frames, buffer[i:]
+
+
+def steering_from_direction(direction, speed=400):
+    """mesafe2.ino'nun "sol" / "duz" / "sag" önerisini (direksiyon, gaz) komutuna çevir"""
+    steering = {"sol": -600, "duz": 0, "sag": 600}.get(direction)
+    if steering is None:
+        return 0, 0  # Bilinmeyen / veri yok: dur
+    return steering, speed
+
+
+def drive_decision(direction, cone_distances=(), cone_angles=(), clear_range=3.0, speed=400):
+    """Sensör yönü + haritadaki öndeki dubalar -> (direksiyon, gaz)
+
+    cone_angles sol pozitif derece (ConeMap.nearest_in_sector). clear_range'den
+    yakın bir duba varsa ondan uzağa dönülür ve yakınlıkla orantılı yavaşlanır.
+    """
+    steering, throttle = steering_from_direction(direction, speed)
+    if throttle == 0 or len(cone_distances) == 0:
+        return steering, throttle
+
+    k = int(min(range(len(cone_distances)), key=lambda i: cone_distances[i]))
+    d = float(cone_distances[k])
+    if d >= clear_range:
+        return steering, throttle
+
+    closeness = 1.0 - d / clear_range
+    away = 1000 if cone_angles[k] >= 0 else -1000  # Duba solda -> sağa dön
+    steering = int(steering + (away - steering) * closeness)
+    throttle = int(throttle * (1.0 - 0.5 * closeness))
+    return steering, throttle
+
+
+class MotorBridge:
+    def __init__(self, port, baudrate=115200, rate_hz=50.0, command_timeout=0.25):
+        self.port_name = port
+        self.baudrate = baudrate
+        self.period = 1.0 / rate_hz
+        self.command_timeout = command_timeout
+
+        self.serial = None
+        self.running = False
+        self.sender_thread = None
+        self.reader_thread = None
+
+        self.lock = threading.Lock()
+        self.steering = 0
+        self.throttle = 0
+        self.estop = False
+        self.command_time = 0.0
+        self.stale = True  # Açılışta ilk komut gelene kadar dur
+
+        self.seq = 0
+        self.sent_times = [0.0] * 256  # seq -> gönderim zamanı
+
+        self.latency = LatencyStats()
+        self.frames_sent = 0
+        self.acks_received = 0
+        self.last_status = None
+        self.last_ack_time = 0.0
+
+    def open(self):
+        """Seri portu aç ve gönderici/okuyucu iş parçacıklarını başlat"""
+        self.serial = serial.Serial(self.port_name, self.baudrate, timeout=0.05, write_timeout=0.05)
+        self.running = True
+        self.sender_thread = threading.Thread(target=self._sender_loop, daemon=True)
+        self.reader_thread = threading.Thread(target=self._reader_loop, daemon=True)
+        self.sender_thread.start()
+        self.reader_thread.start()
+        print(f"Motor köprüsü açıldı: {self.port_name} @ {1.0 / self.period:.0f} Hz")
+
+    def set_command(self, steering, throttle):
+        """Görüntü/sensör hattından yeni karar; her karede çağrılmalı"""
+        with self.lock:
+            self.steering = int(max(-1000, min(1000, steering)))
+            self.throttle = int(max(-1000, min(1000, throttle)))
+            self.estop = False
+            self.command_time = time.perf_counter()
+
+    def emergency_stop(self):
+        with self.lock:
+            self.steering = 0
+            self.throttle = 0
+            self.estop = True
+
+    def _current_frame(self, now):
+        with self.lock:
+            stale = now - self.command_time > self.command_timeout
+            if stale or self.estop:
+                steering, throttle = 0, 0
+                flags = FLAG_ESTOP if self.estop else 0
+            else:
+                steering, throttle, flags = self.steering, self.throttle, FLAG_ENABLE
+
+        if stale and not self.stale:
+            print("Motor köprüsü: komut gelmiyor, araç durduruluyor")
+        elif not stale and self.stale:
+            print("Motor köprüsü: komut alındı, sürüş etkin")
+        self.stale = stale
+
+        seq = self.seq
+        self.seq = (self.seq + 1) & 0xFF
+        return seq, encode_command(seq, steering, throttle, flags)
+
+    def _sender_loop(self):
+        next_tick = time.perf_counter()
+        while self.running:
+            now = time.perf_counter()
+            seq, frame = self._current_frame(now)
+            try:
+                self.sent_times[seq] = time.perf_counter()
+                self.serial.write(frame)
+                self.frames_sent += 1
+            except serial.SerialException as e:
+                print(f"Motor köprüsü yazma hatası: {e}")
+
+            next_tick += self.period
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.perf_counter()
+
+    def _reader_loop(self):
+        buffer = bytearray()
+        while self.running:
+            try:
+                # Bekleyen her şeyi al; hiç yoksa ilk baytı (ya da zaman aşımını) bekle
+                data = self.serial.read(self.serial.in_waiting or 1)
+            except serial.SerialException as e:
+                print(f"Motor köprüsü okuma hatası: {e}")
+                time.sleep(0.1)
+                continue
+            if not data:
+                continue
+
+            now = time.perf_counter()
+            buffer.extend(data)
+            frames, buffer = parse_frames(buffer, ACK_TYPE, ACK_LEN)
+            for frame in frames:
+                seq, status = frame[2], frame[3]
+                self.latency.add(now - self.sent_times[seq])
+                self.acks_received += 1
+                self.last_ack_time = now
+                if status != self.last_status and status & STATUS_WATCHDOG:
+                    print("Motor denetleyicisi: bekçi tetiklendi, motorlar durdu")
+                self.last_status = status
+
+    def link_alive(self, timeout=0.5):
+        """Son timeout saniyede onay geldi mi"""
+        return time.perf_counter() - self.last_ack_time < timeout
+
+    def report(self):
+        print(f"Motor köprüsü: gönderilen {self.frames_sent}, onay {self.acks_received}")
+        print(self.latency.format("komut->onay"))
+
+    def close(self):
+        if self.serial is None:
+            return
+        # Kapanmadan önce son bir "dur" çerçevesi
+        self.emergency_stop()
+        self.running = False
+        for t in (self.sender_thread, self.reader_thread):
+            if t is not None:
+                t.join(timeout=1)
+        try:
+            self.serial.write(encode_command(self.seq, 0, 0, FLAG_ESTOP))
+        except serial.SerialException:
+            pass
+        self.serial.close()
+        self.serial = None
+        self.report()
@@ -0,0 +1,38 @@
+"""
+Gecikme ve döngü süresi ölçümleri için küçük yardımcılar.
+"""
+from collections import deque
+
+import numpy as np
+
+
+class LatencyStats:
+    """Son N ölçümün ortalama / medyan / p95 / maksimum değerleri (saniye)"""
+
+    def __init__(self, window=200):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def summary(self):
+        if not self.samples:
+            return None
+        arr = np.fromiter(self.samples, dtype=np.float64, count=len(self.samples))
+        return {
+            "n": self.count,
+            "mean": float(arr.mean()),
+            "median": float(np.median(arr)),
+            "p95": float(np.percentile(arr, 95)),
+            "max": float(arr.max()),
+        }
+
+    def format(self, name):
+        s = self.summary()
+        if s is None:
+            return f"{name}: ölçüm yok"
+        return (f"{name}: ort {s['mean'] * 1000:.1f} ms | medyan {s['median'] * 1000:.1f} ms | "
+                f"p95 {s['p95'] * 1000:.1f} ms | maks {s['max'] * 1000:.1f} ms (n={s['n']})")
+
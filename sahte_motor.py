@@ -0,0 +1,119 @@
+"""
+Donanımsız deneme için sahte motor denetleyicisi.
+
+Bir sözde terminal (pty) açar ve motor_kontrol.ino gibi davranır: komut
+çerçevelerini çözer, onay gönderir, watchdog_ms boyunca çerçeve gelmezse
+motorları "durdurur". MotorBridge bu terminalin yoluna bağlanır:
+
+    python sahte_motor.py                  # yolu yazdırır, ör. /dev/pts/5
+    MotorBridge("/dev/pts/5").open()
+
+ack_delay ile denetleyici gecikmesi taklit edilebilir.
+"""
+import os
+import pty
+import select
+import threading
+import time
+import tty
+
+from motor_kopru import (CMD_LEN, CMD_TYPE, FLAG_ENABLE, FLAG_ESTOP, STATUS_ENABLED,
+                         STATUS_WATCHDOG, decode_command, encode_ack, parse_frames)
+
+
+class FakeMotorController:
+    def __init__(self, watchdog_ms=200, ack_delay=0.0):
+        self.watchdog = watchdog_ms / 1000.0
+        self.ack_delay = ack_delay
+
+        self.master = None
+        self.slave = None
+        self.port_name = None
+        self.running = False
+        self.thread = None
+
+        self.steering = 0
+        self.throttle = 0
+        self.enabled = False
+        self.watchdog_tripped = True
+        self.last_frame = 0.0
+
+        self.frames = 0
+        self.watchdog_trips = 0
+
+    def start(self):
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.port_name = os.ttyname(self.slave)
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+        return self.port_name
+
+    def _stop_motors(self):
+        self.steering = 0
+        self.throttle = 0
+        self.enabled = False
+
+    def _handle(self, frame):
+        seq, steering, throttle, flags = decode_command(frame)
+        self.frames += 1
+        self.last_frame = time.perf_counter()
+        self.watchdog_tripped = False
+
+        if flags & FLAG_ESTOP or not flags & FLAG_ENABLE:
+            self._stop_motors()
+        else:
+            self.enabled = True
+            self.steering = max(-1000, min(1000, steering))
+            self.throttle = max(-1000, min(1000, throttle))
+
+        status = (STATUS_WATCHDOG if self.watchdog_tripped else 0) | \
+                 (STATUS_ENABLED if self.enabled else 0)
+        if self.ack_delay:
+            time.sleep(self.ack_delay)
+        os.write(self.master, encode_ack(seq, status))
+
+    def _loop(self):
+        buffer = bytearray()
+        while self.running:
+            ready, _, _ = select.select([self.master], [], [], 0.01)
+            if ready:
+                try:
+                    data = os.read(self.master, 256)
+                except OSError:
+                    break
+                buffer.extend(data)
+                frames, buffer = parse_frames(buffer, CMD_TYPE, CMD_LEN)
+                for frame in frames:
+                    self._handle(frame)
+
+            if not self.watchdog_tripped and time.perf_counter() - self.last_frame > self.watchdog:
+                self._stop_motors()
+                self.watchdog_tripped = True
+                self.watchdog_trips += 1
+                print("Sahte denetleyici: bekçi tetiklendi, motorlar durdu")
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1)
+        for fd in (self.master, self.slave):
+            if fd is not None:
+                os.close(fd)
+        self.master = self.slave = None
+
+
+if __name__ == "__main__":
+    fake = FakeMotorController()
+    print(f"Sahte motor denetleyicisi: {fake.start()}")
+    try:
+        while True:
+            time.sleep(1)
+            state = "DURDU" if fake.watchdog_tripped else ("SÜRÜŞ" if fake.enabled else "BEKLEME")
+            print(f"{state:8s} direksiyon={fake.steering:5d} gaz={fake.throttle:5d} "
+                  f"çerçeve={fake.frames} bekçi={fake.watchdog_trips}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake.stop()
@@ -0,0 +1,101 @@
+"""
+Önceden ayrılmış kare tamponları.
+
+Her karede yeni tam boy diziler (zoom sonucu 1280x720x3, gri görüntü, küçültülmüş
+kare) ayırmak küçük araç bilgisayarında bellek çalkalanmasına ve çöp toplayıcı
+duraklamalarına yol açar. BufferPool her aşama için isimli, önceden ayrılmış
+dizileri tutar; OpenCV çağrıları bunları dst= çıktısı olarak kullanır.
+
+Her isim için depth adet dizi sırayla döndürülür: bir önceki karenin sonucu
+hâlâ kullanılırken (ör. ekranda) üzerine yazılmaz. Şekil ya da tür değişirse
+(zoom / ölçek değişimi) o isim için yeniden ayrılır ve sayılır; kararlı
+durumda havuzun kare başına ayırması sıfırdır.
+
+Havuz sayaçları yalnızca havuzun kendi ayırmalarını görür; hattın geri kalanı
+(YOLO, kontur, liste vb.) hâlâ ayırabilir. trace=True ile tracemalloc açılır ve
+her karede kare başındaki bellek üstüne çıkılan tepe (geçici ayırma) ölçülür.
+tracemalloc tüm ayırmaları izlediği için yavaştır; sadece ölçüm için açılmalı.
+"""
+import tracemalloc
+from collections import deque
+
+import numpy as np
+
+
+class BufferPool:
+    def __init__(self, depth=2, window=300, trace=False):
+        self.depth = depth
+        self.buffers = {}   # isim -> [diziler, sıradaki indeks]
+
+        self.allocations = 0
+        self.allocated_bytes = 0
+        self.frames = 0
+        self.frame_allocations = 0
+        self.frame_bytes = 0
+        # Son window karenin (ayırma sayısı, bayt) değerleri
+        self.history = deque(maxlen=window)
+
+        # tracemalloc ile gerçek ayırma: son window karenin geçici tepe baytları
+        self.trace = trace
+        self.traced_history = deque(maxlen=window)
+        self.frame_start_memory = 0
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def get(self, name, shape, dtype=np.uint8):
+        """name için sıradaki tampon; şekil/tür uymuyorsa yeniden ayrılır"""
+        shape = tuple(int(s) for s in shape)
+        dtype = np.dtype(dtype)
+        entry = self.buffers.get(name)
+        if entry is None or entry[0][0].shape != shape or entry[0][0].dtype != dtype:
+            arrays = [np.empty(shape, dtype=dtype) for _ in range(self.depth)]
+            nbytes = sum(a.nbytes for a in arrays)
+            self.allocations += self.depth
+            self.allocated_bytes += nbytes
+            self.frame_allocations += self.depth
+            self.frame_bytes += nbytes
+            entry = self.buffers[name] = [arrays, 0]
+
+        arrays, index = entry
+        entry[1] = (index + 1) % len(arrays)
+        return arrays[index]
+
+    def begin_frame(self):
+        """Yeni kare: önceki karenin ayırma sayısını geçmişe yaz"""
+        if self.frames:
+            self.history.append((self.frame_allocations, self.frame_bytes))
+        if self.trace and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if self.frames:
+                self.traced_history.append(max(0, peak - self.frame_start_memory))
+            tracemalloc.reset_peak()
+            self.frame_start_memory = current
+        self.frames += 1
+        self.frame_allocations = 0
+        self.frame_bytes = 0
+
+    def pooled_bytes(self):
+        return sum(a.nbytes for arrays, _ in self.buffers.values() for a in arrays)
+
+    def stats(self):
+        n = len(self.history)
+        allocs = sum(a for a, _ in self.history)
+        nbytes = sum(b for _, b in self.history)
+        return {
+            "allocations": self.allocations,
+            "allocated_bytes": self.allocated_bytes,
+            "pooled_bytes": self.pooled_bytes(),
+            "allocations_per_frame": allocs / n if n else 0.0,
+            "bytes_per_frame": nbytes / n if n else 0.0,
+            "traced_bytes_per_frame": (sum(self.traced_history) / len(self.traced_history)
+                                       if self.traced_history else None),
+        }
+
+    def report(self):
+        s = self.stats()
+        text = (f"Tampon havuzu: {len(self.buffers)} aşama, {s['pooled_bytes'] / 1e6:.1f} MB, "
+                f"toplam {s['allocations']} ayırma | havuz içi kare başına "
+                f"{s['allocations_per_frame']:.2f} ayırma, {s['bytes_per_frame'] / 1e3:.1f} KB")
+        if s["traced_bytes_per_frame"] is not None:
+            text += f" | tüm hat (tracemalloc) kare başına {s['traced_bytes_per_frame'] / 1e3:.1f} KB geçici"
+        return text
@@ -0,0 +1,164 @@
+"""
+Yüz dedektörü karşılaştırması (Haar / YuNet).
+
+Kaydedilmiş kliplerde her arka ucun hızını ve yakalama oranını ölçer:
+
+    python yuz_benchmark.py klip1.mp4 klip2.mp4 --backends haar yunet --save
+
+Klibin yanında aynı isimde bir .json etiket dosyası varsa
+(örn. klip1.json: {"12": [[x, y, w, h], ...], ...}, anahtar kare numarası)
+IoU >= 0.5 ile recall hesaplanır. Etiket yoksa yüz bulunan kare oranı
+raporlanır. --save ile bu makinede en hızlı ve recall'u en iyiye yakın arka uç
+yuz_dedektor_secim.json dosyasına yazılır; PanTiltController(face_backend="auto")
+bu dosyayı okur.
+"""
+import argparse
+import json
+import os
+import time
+
+import cv2
+
+from yuz_tespit import BACKENDS, SELECTION_FILE, create_face_detector
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+def load_labels(clip_path):
+    label_path = os.path.splitext(clip_path)[0] + ".json"
+    if not os.path.exists(label_path):
+        return None
+    with open(label_path) as f:
+        return {int(k): v for k, v in json.load(f).items()}
+
+
+def read_frames(clip_path, max_frames):
+    """Klibi belleğe oku; disk/dekod süresi ölçüme karışmasın"""
+    cap = cv2.VideoCapture(clip_path)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def run_backend(detector, frames, labels, scale):
+    matched = 0
+    total_labels = 0
+    frames_with_face = 0
+
+    start = time.perf_counter()
+    outputs = [detector.detect(frame, scale) for frame in frames]
+    elapsed = time.perf_counter() - start
+
+    for i, faces in enumerate(outputs):
+        if faces:
+            frames_with_face += 1
+        if labels is not None and i in labels:
+            for gt in labels[i]:
+                total_labels += 1
+                if any(iou(gt, f) >= 0.5 for f in faces):
+                    matched += 1
+
+    return {
+        "fps": len(frames) / elapsed if elapsed > 0 else 0.0,
+        "ms": elapsed * 1000 / max(1, len(frames)),
+        "face_rate": frames_with_face / max(1, len(frames)),
+        "recall": matched / total_labels if total_labels else None,
+        "matched": matched,
+        "labels": total_labels,  # Sadece okunan karelerdeki etiketler
+    }
+
+
+def choose_backend(summary, tolerance=0.05):
+    """Recall'u (yoksa yüz bulma oranı) en iyiye tolerance kadar yakın olanların en hızlısı"""
+    def quality(s):
+        return s["recall"] if s["recall"] is not None else s["face_rate"]
+
+    best_quality = max(quality(s) for s in summary.values())
+    candidates = [name for name, s in summary.items() if quality(s) >= best_quality - tolerance]
+    return max(candidates, key=lambda name: summary[name]["fps"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yüz dedektörü karşılaştırması")
+    parser.add_argument("clips", nargs="+", help="Kaydedilmiş video klipler")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--scale", type=float, default=1.0, help="Tespit ölçeği (0.5 = yarım çözünürlük)")
+    parser.add_argument("--max-frames", type=int, default=300)
+    parser.add_argument("--save", action="store_true", help=f"Seçimi {SELECTION_FILE} dosyasına yaz")
+    args = parser.parse_args()
+
+    detectors = {}
+    for name in args.backends:
+        detector = create_face_detector(name)
+        if detector.name == name:  # Geri dönüş olduysa aynı arka ucu iki kez ölçme
+            detectors[name] = detector
+
+    totals = {name: {"frames": 0, "time": 0.0, "faces": 0.0, "matched": 0, "labels": 0}
+              for name in detectors}
+
+    for clip in args.clips:
+        frames = read_frames(clip, args.max_frames)
+        if not frames:
+            print(f"{clip}: okunamadı")
+            continue
+        labels = load_labels(clip)
+        print(f"\n{clip}: {len(frames)} kare, {frames[0].shape[1]}x{frames[0].shape[0]}"
+              f"{', etiketli' if labels else ''}")
+
+        for name, detector in detectors.items():
+            detector.detect(frames[0], args.scale)  # Isınma
+            r = run_backend(detector, frames, labels, args.scale)
+            recall = f"{r['recall'] * 100:.1f}%" if r["recall"] is not None else "-"
+            print(f"  {name:6s} {r['fps']:7.1f} FPS | {r['ms']:6.1f} ms/kare | "
+                  f"yüz bulunan kare: {r['face_rate'] * 100:5.1f}% | recall: {recall}")
+
+            t = totals[name]
+            t["frames"] += len(frames)
+            t["time"] += len(frames) / r["fps"] if r["fps"] else 0.0
+            t["faces"] += r["face_rate"] * len(frames)
+            t["matched"] += r["matched"]
+            t["labels"] += r["labels"]
+
+    summary = {}
+    for name, t in totals.items():
+        if t["frames"] == 0:
+            continue
+        summary[name] = {
+            "fps": t["frames"] / t["time"] if t["time"] else 0.0,
+            "face_rate": t["faces"] / t["frames"],
+            "recall": t["matched"] / t["labels"] if t["labels"] else None,
+        }
+
+    if not summary:
+        return
+
+    print("\nToplam:")
+    for name, s in summary.items():
+        recall = f"{s['recall'] * 100:.1f}%" if s["recall"] is not None else "-"
+        print(f"  {name:6s} {s['fps']:7.1f} FPS | yüz bulunan kare: {s['face_rate'] * 100:5.1f}% | "
+              f"recall: {recall}")
+
+    selected = choose_backend(summary)
+    print(f"\nBu makine için önerilen arka uç: {selected}")
+
+    if args.save:
+        with open(SELECTION_FILE, "w") as f:
+            json.dump({"backend": selected, "scale": args.scale, "summary": summary}, f, indent=2)
+        print(f"Seçim {SELECTION_FILE} dosyasına kaydedildi")
+
+
+if __name__ == "__main__":
+    main()
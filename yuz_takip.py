@@ -0,0 +1,160 @@
+"""
+Çoklu yüz takibi ve hedef kilitleme.
+
+Her karedeki yüzler önceki izlerle IoU matrisi üzerinden (tek seferde
+hesaplanır) açgözlü eşleştirilir; eşleşen iz kimliğini korur, eşleşmeyen yüz
+yeni iz açar, max_missed kare görülmeyen iz silinir.
+
+Pan-tilt kafa bir kez seçilen ize kilitlenir ve o iz yaşadıkça başka yüze
+geçmez; politika sadece kilit yokken (ilk seçim ya da kilitli iz silinince)
+değerlendirilir:
+
+    largest    : en büyük yüz (eski davranış, ama her karede yeniden seçilmez)
+    first_seen : en uzun süredir görülen yüz
+    center     : görüntü merkezine en yakın yüz
+    clicked    : fareyle tıklanan yüz (tıklanana kadar largest)
+
+Hangi politikada olursa olsun yüz modunda bir yüze tıklamak kilidi ona taşır.
+"""
+import time
+
+import numpy as np
+
+from karo_tespit import box_iou
+
+
+POLICIES = ("largest", "first_seen", "center", "clicked")
+
+
+class FaceTrack:
+    __slots__ = ("track_id", "box", "hits", "missed", "first_seen")
+
+    def __init__(self, track_id, box, now):
+        self.track_id = track_id
+        self.box = box          # (x, y, w, h)
+        self.hits = 1
+        self.missed = 0
+        self.first_seen = now
+
+    @property
+    def center(self):
+        x, y, w, h = self.box
+        return x + w // 2, y + h // 2
+
+
+class FaceTracker:
+    def __init__(self, policy="largest", iou_threshold=0.3, max_missed=10, min_hits=2):
+        if policy not in POLICIES:
+            raise ValueError(f"Bilinmeyen kilit politikası: {policy}")
+        self.policy = policy
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed  # Bu kadar kare görünmeyen iz silinir
+        self.min_hits = min_hits      # Tek karelik yanlış tespitlere kilitlenme
+
+        self.tracks = []
+        self.next_id = 1
+        self.locked_id = None
+
+    def reset(self):
+        self.tracks = []
+        self.locked_id = None
+
+    def release(self):
+        """Kilidi bırak; bir sonraki select politikaya göre yeniden seçer"""
+        self.locked_id = None
+
+    def cycle_policy(self):
+        self.policy = POLICIES[(POLICIES.index(self.policy) + 1) % len(POLICIES)]
+        self.release()
+        return self.policy
+
+    # ---------------------------------------------------------------- eşleştirme
+    def update(self, faces, now=None):
+        """Bu karenin (x, y, w, h) yüzleriyle izleri güncelle; görünen izleri döndür"""
+        now = time.time() if now is None else now
+        dets = np.asarray(faces, dtype=np.float32).reshape(-1, 4)
+
+        matched_tracks = set()
+        matched_dets = set()
+        if self.tracks and len(dets):
+            t = np.array([tr.box for tr in self.tracks], dtype=np.float32)
+            t[:, 2:] += t[:, :2]
+            d = dets.copy()
+            d[:, 2:] += d[:, :2]
+            iou = box_iou(t, d)
+
+            # En yüksek IoU'dan başlayarak açgözlü eşleştir
+            for flat in np.argsort(-iou, axis=None):
+                ti, di = divmod(int(flat), iou.shape[1])
+                if iou[ti, di] < self.iou_threshold:
+                    break
+                if ti in matched_tracks or di in matched_dets:
+                    continue
+                matched_tracks.add(ti)
+                matched_dets.add(di)
+                track = self.tracks[ti]
+                track.box = tuple(int(v) for v in faces[di])
+                track.hits += 1
+                track.missed = 0
+
+        for ti, track in enumerate(self.tracks):
+            if ti not in matched_tracks:
+                track.missed += 1
+
+        for di in range(len(dets)):
+            if di not in matched_dets:
+                self.tracks.append(FaceTrack(self.next_id, tuple(int(v) for v in faces[di]), now))
+                self.next_id += 1
+
+        self.tracks = [tr for tr in self.tracks if tr.missed <= self.max_missed]
+        if self.locked_id is not None and self.get(self.locked_id) is None:
+            self.locked_id = None
+
+        return self.visible()
+
+    def get(self, track_id):
+        for track in self.tracks:
+            if track.track_id == track_id:
+                return track
+        return None
+
+    def visible(self):
+        return [tr for tr in self.tracks if tr.missed == 0]
+
+    # ---------------------------------------------------------------- kilit
+    def select(self, frame_w, frame_h):
+        """Kilitli iz bu karede görünüyorsa onu döndür; kilit yoksa politikaya göre seç
+
+        Kilitli iz geçici olarak kaybolduysa None döner ama kilit iz silinene kadar
+        korunur; başka bir yüze atlanmaz.
+        """
+        if self.locked_id is not None:
+            track = self.get(self.locked_id)
+            return track if track.missed == 0 else None
+
+        candidates = [tr for tr in self.visible() if tr.hits >= self.min_hits]
+        if not candidates:
+            return None
+
+        if self.policy == "first_seen":
+            track = min(candidates, key=lambda tr: tr.first_seen)
+        elif self.policy == "center":
+            cx, cy = frame_w / 2, frame_h / 2
+            track = min(candidates,
+                        key=lambda tr: (tr.center[0] - cx) ** 2 + (tr.center[1] - cy) ** 2)
+        else:  # largest, clicked (tıklama gelene kadar)
+            track = max(candidates, key=lambda tr: tr.box[2] * tr.box[3])
+
+        self.locked_id = track.track_id
+        return track
+
+    def lock_at(self, x, y):
+        """(x, y) noktasını içeren görünen yüze kilitlen; bulunduysa True"""
+        hits = [tr for tr in self.visible()
+                if tr.box[0] <= x <= tr.box[0] + tr.box[2] and tr.box[1] <= y <= tr.box[1] + tr.box[3]]
+        if not hits:
+            return False
+        # İç içe kutularda en küçüğü (tıklanan yüze en sıkı oturan)
+        track = min(hits, key=lambda tr: tr.box[2] * tr.box[3])
+        self.locked_id = track.track_id
+        return True
@@ -0,0 +1,115 @@
+"""
+Değiştirilebilir yüz dedektörleri.
+
+Her arka uç detect(frame, scale) ile aynı (x, y, w, h) listesini döndürür;
+scale < 1 ise tespit küçültülmüş karede yapılır ve kutular geri ölçeklenir.
+pool (tampon_havuzu.BufferPool) verilirse gri / küçük kareler havuzdan gelir.
+
+    haar  : haarcascade_frontalface_default.xml, detectMultiScale(gray, 1.3, 5)
+    yunet : OpenCV DNN YuNet (yerel ONNX dosyası), profil yüzlerde daha iyi
+    auto  : yuz_benchmark.py'nin bu makine için seçtiği arka uç
+
+YuNet modeli depoya eklenmez; face_detection_yunet_2023mar.onnx dosyasını
+(opencv_zoo) proje klasörüne koyun. Dosya yoksa Haar'a geri dönülür.
+"""
+import json
+import os
+
+import cv2
+
+
+YUNET_MODEL = "face_detection_yunet_2023mar.onnx"
+SELECTION_FILE = "yuz_dedektor_secim.json"
+
+
+def _pooled(pool, name, shape):
+    """Havuz varsa dst= için tampon, yoksa None (OpenCV yeni dizi ayırır)"""
+    return None if pool is None else pool.get(name, shape)
+
+
+class HaarFaceDetector:
+    name = "haar"
+
+    def __init__(self, scale_factor=1.3, min_neighbors=5, cascade_path=None, pool=None):
+        if cascade_path is None:
+            cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.pool = pool
+
+    def detect(self, frame, scale=1.0):
+        h, w = frame.shape[:2]
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=_pooled(self.pool, "yuz_gri", (h, w)))
+        if scale != 1.0:
+            size = (int(round(w * scale)), int(round(h * scale)))
+            gray = cv2.resize(gray, size, dst=_pooled(self.pool, "yuz_kucuk", size[::-1]),
+                              interpolation=cv2.INTER_AREA)
+        faces = self.cascade.detectMultiScale(gray, self.scale_factor, self.min_neighbors)
+        return [tuple(int(v / scale) for v in f) for f in faces]
+
+
+class YuNetFaceDetector:
+    name = "yunet"
+
+    def __init__(self, model_path=YUNET_MODEL, score_threshold=0.7, nms_threshold=0.3, top_k=50,
+                 pool=None):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"YuNet modeli bulunamadı: {model_path}")
+        self.detector = cv2.FaceDetectorYN.create(
+            model_path, "", (320, 320), score_threshold, nms_threshold, top_k)
+        self.input_size = None
+        self.pool = pool
+
+    def detect(self, frame, scale=1.0):
+        if scale != 1.0:
+            h, w = frame.shape[:2]
+            size = (int(round(w * scale)), int(round(h * scale)))
+            frame = cv2.resize(frame, size, dst=_pooled(self.pool, "yunet_kucuk", (size[1], size[0], 3)),
+                               interpolation=cv2.INTER_AREA)
+
+        h, w = frame.shape[:2]
+        if self.input_size != (w, h):
+            self.detector.setInputSize((w, h))
+            self.input_size = (w, h)
+
+        _, faces = self.detector.detect(frame)
+        if faces is None:
+            return []
+        # faces satırları: x, y, w, h, 5 yüz noktası, skor
+        return [tuple(int(v / scale) for v in f[:4]) for f in faces]
+
+
+BACKENDS = {
+    "haar": HaarFaceDetector,
+    "yunet": YuNetFaceDetector,
+}
+
+
+def load_selected_backend(path=SELECTION_FILE, default="haar"):
+    """yuz_benchmark.py'nin kaydettiği seçimi oku"""
+    try:
+        with open(path) as f:
+            return json.load(f).get("backend", default)
+    except (OSError, ValueError):
+        return default
+
+
+def create_face_detector(backend="haar", pool=None, **kwargs):
+    """Arka ucu oluştur; oluşturulamazsa Haar'a geri dön"""
+    if backend == "auto":
+        backend = load_selected_backend()
+
+    cls = BACKENDS.get(backend)
+    if cls is None:
+        print(f"Bilinmeyen yüz dedektörü: {backend}, Haar kullanılacak")
+        return HaarFaceDetector(pool=pool)
+
+    try:
+        detector = cls(pool=pool, **kwargs)
+    except (FileNotFoundError, AttributeError, cv2.error) as e:
+        print(f"{backend} yüz dedektörü başlatılamadı ({e}), Haar kullanılacak")
+        return HaarFaceDetector(pool=pool)
+
+    print(f"Yüz dedektörü: {detector.name}")
+    return detector
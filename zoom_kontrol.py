@@ -0,0 +1,84 @@
+"""
+Hedef boyutuna göre sürekli (her karede) otomatik zoom.
+
+Eski auto_adjust_zoom saniyede en fazla bir kez ±0.1 adım atıyordu; 3x zoom'a
+ulaşmak ~20 saniye sürüyordu. Burada hedef zoom doğrudan ölçülen kutu boyutundan
+hesaplanır:
+
+    hedef_zoom = zoom * hedef_boyut / ölçülen_boyut
+
+Ölçüm zoom'dan bağımsız "1x boyutu"na (boyut / zoom) çevrilip log uzayında
+süzülür, zoom değişimi log uzayında hız sınırlı bir rampa ile uygulanır.
+Servo yeni komut aldıysa ya da hedef merkezden uzaksa zoom in yapılmaz
+(büyütme piksel hatasını da büyütür ve servo hedefi aşar); zoom out her zaman
+serbesttir.
+"""
+import math
+import time
+
+
+class ZoomController:
+    def __init__(self, zoom_min=1.0, zoom_max=5.0,
+                 max_rate=1.0,        # log(zoom)/s: 1.0 -> saniyede ~2.7 kat
+                 size_alpha=0.3,      # Boyut süzgeci (0-1, büyük = hızlı tepki)
+                 dead_band=0.12,      # Bu orandan küçük boyut hatalarında zoom sabit
+                 settle_time=0.35,    # Servo komutundan sonra zoom in için bekleme
+                 max_center_offset=0.35):  # Merkeze uzaklık (yarım kare oranı) sınırı
+        self.zoom_min = zoom_min
+        self.zoom_max = zoom_max
+        self.max_rate = max_rate
+        self.size_alpha = size_alpha
+        self.dead_band = dead_band
+        self.settle_time = settle_time
+        self.max_center_offset = max_center_offset
+
+        self.log_base_size = None  # Süzülmüş log(boyut / zoom)
+        self.last_update = None
+        self.desired_zoom = None
+
+    def reset(self):
+        """Hedef kaybolunca süzgeci sıfırla"""
+        self.log_base_size = None
+        self.last_update = None
+        self.desired_zoom = None
+
+    def update(self, zoom, size_px, target_px, measured_zoom=None,
+               last_servo_move=0.0, center_offset=0.0, now=None):
+        """Yeni zoom seviyesini döndür.
+
+        zoom: şu anki zoom, size_px: ölçülen kutu boyutu (yüz genişliği / duba
+        yüksekliği), measured_zoom: ölçümün yapıldığı karedeki zoom (varsayılan
+        zoom), center_offset: hedefin merkeze uzaklığı / yarım kare boyu.
+        """
+        now = time.time() if now is None else now
+        if size_px <= 0:
+            return zoom
+        measured_zoom = zoom if measured_zoom is None else measured_zoom
+
+        # Zoom'dan bağımsız boyut, log uzayında üstel süzgeç
+        log_base = math.log(size_px / measured_zoom)
+        if self.log_base_size is None:
+            self.log_base_size = log_base
+        else:
+            self.log_base_size += self.size_alpha * (log_base - self.log_base_size)
+
+        dt = 0.0 if self.last_update is None else min(0.1, now - self.last_update)
+        self.last_update = now
+
+        desired = target_px / math.exp(self.log_base_size)
+        desired = max(self.zoom_min, min(self.zoom_max, desired))
+        self.desired_zoom = desired
+
+        error = math.log(desired / zoom)
+        if abs(error) < math.log(1.0 + self.dead_band):
+            return zoom
+
+        # Servo hareket ederken / hedef kenardayken büyütme yapma
+        servo_busy = (now - last_servo_move) < self.settle_time
+        if error > 0 and (servo_busy or center_offset > self.max_center_offset):
+            return zoom
+
+        max_step = self.max_rate * dt
+        step = max(-max_step, min(max_step, error))
+        new_zoom = zoom * math.exp(step)
+        return max(self.zoom_min, min(self.zoom_max, new_zoom))